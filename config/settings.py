@@ -146,6 +146,18 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# -------------------------
+# Media (ملفات الاستيراد المرفوعة)
+# -------------------------
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
+# ✅ كاش ملفات التصدير (مش تحت media علشان ما يتخدمش public)
+EXPORT_CACHE_DIR = BASE_DIR / "export_cache"
+
+# ✅ عدد الصفوف في صفحة الباحثين (?page_size= بيغيره لحد 500)
+RESEARCHERS_PAGE_SIZE = int(os.getenv("RESEARCHERS_PAGE_SIZE", "50"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # -------------------------
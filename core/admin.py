@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
+
+from core.fees import provision_fee_year
 from .models import (
     Department,
     Supervisor,
@@ -54,6 +57,7 @@ class ResearchAdmin(admin.ModelAdmin):
     search_fields = ["researcher_name", "title", "phone"]
     autocomplete_fields = ["department"]
     inlines = [ResearchSupervisionInlineForResearch, ResearchFeePaymentInline]
+    actions = ["provision_current_year_fees"]
 
     fieldsets = (
         ("البيانات الأساسية", {
@@ -68,6 +72,15 @@ class ResearchAdmin(admin.ModelAdmin):
     )
 
 
+    @admin.action(description="إنشاء مصروفات السنة الحالية (لم يدفع) للمحدد")
+    def provision_current_year_fees(self, request, queryset):
+        # ✅ INSERT بالجملة بيتجاهل السنين الموجودة (نفس rollover_fee_year)
+        year = timezone.localdate().year
+        created = provision_fee_year(year, researches=queryset)
+        skipped = queryset.filter(fee_payments__year=year).count() - created
+        self.message_user(request, f"{year}: {created} fee rows created | {skipped} already existed")
+
+
 @admin.register(ResearchSupervision)
 class ResearchSupervisionAdmin(admin.ModelAdmin):
     list_display = ["research", "supervisor", "role"]
@@ -82,7 +95,7 @@ class ResearchFeePaymentAdmin(admin.ModelAdmin):
     search_fields = ["research__researcher_name"]
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import DepartmentUser
+from .models import DepartmentUser, ImportCheckpoint, ImportJob, ImportLock, ImportRowFingerprint, ResearchNearDuplicate
 
 # تسجيل موديل DepartmentUser ليظهر في الأدمين
 @admin.register(DepartmentUser)
@@ -107,4 +120,35 @@ class UserAdmin(BaseUserAdmin):
         if hasattr(obj, 'department_user'):
             return obj.department_user.department.name
         return "N/A"
-    get_department.short_description = "القسم"
\ No newline at end of file
+    get_department.short_description = "القسم"
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ["original_name", "status", "rows_processed", "rows_total", "created_research", "created_by", "created_at"]
+    list_filter = ["status"]
+    readonly_fields = [f.name for f in ImportJob._meta.fields]
+
+
+@admin.register(ImportLock)
+class ImportLockAdmin(admin.ModelAdmin):
+    # holder/acquired_at بيتمسحوا يدويًا لو process مات وشايل القفل
+    list_display = ["name", "holder", "acquired_at"]
+
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ["file_name", "sheet", "last_line", "rows_committed", "completed", "updated_at"]
+    list_filter = ["completed"]
+
+
+@admin.register(ImportRowFingerprint)
+class ImportRowFingerprintAdmin(admin.ModelAdmin):
+    list_display = ["researcher_name", "fingerprint", "created_at"]
+    search_fields = ["researcher_name", "fingerprint"]
+
+
+@admin.register(ResearchNearDuplicate)
+class ResearchNearDuplicateAdmin(admin.ModelAdmin):
+    list_display = ["research", "other", "score", "created_at"]
+    list_select_related = ["research", "other"]
+    raw_id_fields = ["research", "other"]
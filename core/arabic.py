@@ -0,0 +1,64 @@
+# =========================================
+# file: core/arabic.py
+# =========================================
+"""
+توحيد النص العربي للبحث والمقارنة:
+- شيل التشكيل والتطويل
+- أ/إ/آ/ٱ -> ا ، ة -> ه ، ى -> ي ، ؤ -> و ، ئ -> ي
+- أي حاجة مش حرف/رقم -> مسافة، والإنجليزي lowercase
+"أَلعاب" و "العاب" و "ألعاب" كلهم بيطلعوا "العاب".
+"""
+import re
+from typing import List
+
+
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_NON_WORD = re.compile(r"[^\w]+|_")
+
+_LETTERS = str.maketrans({
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    "ؤ": "و",
+    "ئ": "ي",
+    # أرقام عربية/فارسية -> لاتيني
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+})
+
+
+def normalize_arabic(text) -> str:
+    if not text:
+        return ""
+    text = _DIACRITICS.sub("", str(text))
+    text = text.translate(_LETTERS).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def tokenize(text, max_length: int = 100) -> List[str]:
+    """كلمات النص بعد التوحيد، من غير تكرار وبنفس الترتيب."""
+    seen = {}
+    for token in normalize_arabic(text).split():
+        seen.setdefault(token[:max_length], None)
+    return list(seen)
+
+
+# حروف/أدوات بتلزق في أول الكلمة (والتأثير / بالبرنامج / للطلاب)
+PROCLITICS = ("وبال", "وال", "بال", "كال", "فال", "لل", "ال", "و", "ب", "ل", "ف", "ك")
+
+
+def index_terms(text, min_stem: int = 3) -> List[str]:
+    """
+    كلمات الفهرسة: كل كلمة + نفس الكلمة من غير السوابق (لو الباقي >= min_stem حروف)،
+    علشان "تاثير" يلاقي "والتاثير" و "برنامج" يلاقي "بالبرنامج".
+    """
+    seen = {}
+    for token in tokenize(text):
+        seen.setdefault(token, None)
+        for prefix in PROCLITICS:
+            if token.startswith(prefix) and len(token) - len(prefix) >= min_stem:
+                seen.setdefault(token[len(prefix):], None)
+    return list(seen)
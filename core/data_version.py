@@ -0,0 +1,25 @@
+# =========================================
+# file: core/data_version.py
+# =========================================
+"""
+إصدار الداتا: رقم بيزيد مع كل تعديل في الأبحاث/المشرفين/الروابط/الأقسام.
+أي حاجة محسوبة من الداتا (ملفات التصدير مثلاً) تتخزن بالرقم ده وتبقى صالحة لحد ما يزيد.
+"""
+from django.db.models import F
+
+from core.models import DataVersion
+
+
+DATASET = "dataset"
+
+
+def get_data_version(key: str = DATASET) -> int:
+    version = DataVersion.objects.filter(key=key).values_list("version", flat=True).first()
+    return version or 0
+
+
+def bump_data_version(key: str = DATASET) -> None:
+    # ✅ UPDATE واحد (atomic) بدل read-modify-write
+    if not DataVersion.objects.filter(key=key).update(version=F("version") + 1):
+        DataVersion.objects.get_or_create(key=key)
+        DataVersion.objects.filter(key=key).update(version=F("version") + 1)
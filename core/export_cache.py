@@ -0,0 +1,175 @@
+# =========================================
+# file: core/export_cache.py
+# =========================================
+"""
+كاش ملفات التصدير على الديسك:
+- المفتاح = (نوع التصدير + الفلاتر + إصدار الداتا)، فأي تعديل في الداتا بيلغي القديم لوحده
+- طلب متكرر بيتبعت من الملف على طول (FileResponse)
+- طلبات متزامنة لنفس المفتاح: واحد بس بيبني (lock file) والباقي بيستنوا الملف
+  (شغال بين كل الـ gunicorn workers لأنه على الديسك مش في الذاكرة)
+- الكاش محدود: المفاتيح بس من فلاتر محدودة (sf / المشرف / القسم)، والبحث الحر (q) مش بيتخزن
+  (build_file_response)، والملفات القديمة بتتمسح مرة واحدة لما الإصدار يتغير مش مع كل build
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse
+
+from core.data_version import get_data_version
+from core.exporters import XLSX_CONTENT_TYPE
+
+
+# lock أقدم من كده = worker مات في النص -> يتشال
+STALE_LOCK_SECONDS = 600
+WAIT_POLL_SECONDS = 0.2
+
+VERSION_MARKER = ".cleaned_version"
+_cleaned_version = -1      # نفس الـ marker في ذاكرة الـ process (من غير قراءة الملف كل طلب)
+
+
+def cache_dir() -> Path:
+    path = Path(getattr(settings, "EXPORT_CACHE_DIR", Path(settings.BASE_DIR) / "export_cache"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def cache_key(kind: str, params: dict, version: int) -> str:
+    raw = json.dumps([kind, params], sort_keys=True, ensure_ascii=False)
+    return f"{kind}-v{version}-{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]}"
+
+
+def _try_lock(lock_path: Path) -> bool:
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _unlock(lock_path: Path):
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+def _lock_is_stale(lock_path: Path) -> bool:
+    try:
+        return time.time() - lock_path.stat().st_mtime > STALE_LOCK_SECONDS
+    except FileNotFoundError:
+        return False
+
+
+def _drop_old_versions(directory: Path, version: int):
+    """
+    الملفات بإصدار أقدم عمرها ما هتتطلب تاني - بتتمسح مرة واحدة لكل إصدار جديد:
+    ملف VERSION_MARKER فيه آخر إصدار اتنضف، فباقي الطلبات مش بتعمل glob على الفولدر.
+    """
+    global _cleaned_version
+    if _cleaned_version >= version:
+        return
+    marker = directory / VERSION_MARKER
+    try:
+        cleaned = int(marker.read_text())
+    except (OSError, ValueError):
+        cleaned = -1
+    if cleaned < version:
+        for p in directory.glob("*-v*"):
+            if p.suffix not in (".xlsx", ".zip"):
+                continue
+            try:
+                if int(p.name.split("-v", 1)[1].split("-", 1)[0]) < version:
+                    p.unlink()
+            except (ValueError, IndexError, OSError):
+                # اسم مش بتاعنا أو الملف مفتوح (Windows) -> يتشال المرة الجاية
+                continue
+        try:
+            marker.write_text(str(version))
+        except OSError:
+            pass
+    _cleaned_version = version
+
+
+def _paths(kind: str, params: dict, suffix: str):
+    directory = cache_dir()
+    version = get_data_version()
+    _drop_old_versions(directory, version)
+    key = cache_key(kind, params, version)
+    return directory, directory / f"{key}{suffix}", directory / f"{key}.lock"
+
+
+def get_or_build_file(kind: str, params: dict, write, suffix: str = ".xlsx") -> Path:
+    """
+    يرجّع مسار ملف جاهز للمفتاح ده.
+    write(path) بيكتب الملف وبيتنادى مرة واحدة بس لكل مفتاح.
+    """
+    directory, path, lock_path = _paths(kind, params, suffix)
+
+    while True:
+        if path.exists():
+            return path
+
+        if _try_lock(lock_path):
+            try:
+                # لو حد تاني خلّص قبل ما ناخد الـ lock
+                if path.exists():
+                    return path
+                fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                os.close(fd)
+                try:
+                    write(tmp_name)
+                    # ✅ os.replace atomic: محدش يشوف ملف نص مكتوب
+                    os.replace(tmp_name, path)
+                finally:
+                    if os.path.exists(tmp_name):
+                        os.remove(tmp_name)
+            finally:
+                _unlock(lock_path)
+            return path
+
+        # ✅ فيه build شغال لنفس المفتاح -> نستنى الملف بدل ما نبني تاني
+        if _lock_is_stale(lock_path):
+            _unlock(lock_path)
+            continue
+        time.sleep(WAIT_POLL_SECONDS)
+
+
+def get_or_build(kind: str, params: dict, build) -> Path:
+    """
+    يرجّع مسار ملف xlsx جاهز للمفتاح ده.
+    build() بيرجّع openpyxl Workbook وبيتنادى مرة واحدة بس لكل مفتاح.
+    """
+    return get_or_build_file(kind, params, lambda path: build().save(path))
+
+
+def cached_path(kind: str, params: dict, suffix: str = ".xlsx"):
+    """(الملف لو جاهز للإصدار الحالي أو None، وهل فيه build شغال له) - من غير ما يستنى."""
+    _, path, lock_path = _paths(kind, params, suffix)
+    if path.exists():
+        return path, False
+    return None, lock_path.exists() and not _lock_is_stale(lock_path)
+
+
+def cached_file_response(path: Path, filename_header: str) -> FileResponse:
+    response = FileResponse(open(path, "rb"), content_type=XLSX_CONTENT_TYPE)
+    response["Content-Disposition"] = filename_header
+    return response
+
+
+def build_file_response(build, filename_header: str) -> FileResponse:
+    """
+    تصدير من غير كاش (البحث الحر q: كل نص مفتاح جديد والكاش يكبر من غير حد).
+    الملف المؤقت بيتمسح لوحده لما الـ response يتقفل.
+    """
+    tmp = tempfile.TemporaryFile(suffix=".xlsx")
+    build().save(tmp)
+    tmp.seek(0)
+    response = FileResponse(tmp, content_type=XLSX_CONTENT_TYPE)
+    response["Content-Disposition"] = filename_header
+    return response
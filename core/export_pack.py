@@ -0,0 +1,133 @@
+# =========================================
+# file: core/export_pack.py
+# =========================================
+"""
+"حزمة التصدير": ملف zip فيه workbook لكل قسم + workbook لكل مشرف.
+- كل workbook بيتبني في process لوحده (ProcessPoolExecutor) -> الوقت بيقل مع عدد الـ cores
+- البناء بيعدي على export_cache، فنفس الملفات بتتشارك مع export.xlsx / export-department.xlsx
+  (ولو الداتا متغيرتش الحزمة التانية بتطلع من الكاش على طول)
+- الحزمة نفسها بتتخزن في الكاش (kind="pack") وبتتبني برا الـ request:
+  python manage.py export_pack (بالتوازي) أو thread في الخلفية من الويب (worker واحد)،
+  والـ view بيبعت الملف الجاهز بس
+"""
+import re
+import threading
+import zipfile
+from typing import List, NamedTuple, Optional
+
+from django.db import close_old_connections, connections
+
+from core.export_cache import cached_path, get_or_build, get_or_build_file
+from core.exporters import build_department_workbook, build_export_workbook
+from core.models import Department, Supervisor
+
+
+class PackEntry(NamedTuple):
+    kind: str          # "department" | "export"
+    obj_id: int
+    arcname: str       # المسار جوه الـ zip
+
+
+def _safe_name(text: str) -> str:
+    text = re.sub(r'[\\/:*?"<>|]+', "_", (text or "").strip())
+    return re.sub(r"\s+", " ", text)[:80] or "-"
+
+
+def pack_entries() -> List[PackEntry]:
+    entries = [
+        PackEntry("department", d.id, f"departments/{_safe_name(d.name)}.xlsx")
+        for d in Department.objects.order_by("name").only("id", "name")
+    ]
+    # ✅ المشرفين اللي عندهم إشرافات بس (الاسم ممكن يتكرر -> الـ id في اسم الملف)
+    sups = Supervisor.objects.filter(researchsupervision__isnull=False).distinct().order_by("name", "id")
+    entries.extend(
+        PackEntry("export", s.id, f"supervisors/{_safe_name(s.name)}__{s.id}.xlsx")
+        for s in sups.only("id", "name")
+    )
+    return entries
+
+
+def build_entry(entry: PackEntry, sf: str) -> str:
+    """بناء (أو جلب من الكاش) workbook واحد - بتشتغل جوه worker process."""
+    if entry.kind == "department":
+        dept = Department.objects.get(id=entry.obj_id)
+        path = get_or_build("department", {"dept_id": dept.id, "sf": sf}, lambda: build_department_workbook(dept, sf=sf))
+    else:
+        # نفس مفتاح export.xlsx?supervisor_id=..&sf=.. (الـ id جاي من الـ URL كنص)
+        supervisor_id = str(entry.obj_id)
+        path = get_or_build(
+            "export",
+            {"q": "", "supervisor_id": supervisor_id, "sf": sf},
+            lambda: build_export_workbook(q="", supervisor_id=supervisor_id, sf=sf),
+        )
+    return str(path)
+
+
+def _build_entry(args):
+    entry, sf = args
+    return build_entry(entry, sf)
+
+
+def build_pack(fileobj, sf: str = "active", workers: int = 1) -> int:
+    """
+    يكتب الـ zip في fileobj ويرجّع عدد الـ workbooks.
+    الملفات بتتضاف للـ zip بنفس ترتيب pack_entries أول ما تخلص.
+    workers > 1 بيقفل connections الـ DB بتاعة الـ process (قبل الـ fork) -> للأمر بس، مش جوه request.
+    """
+    entries = pack_entries()
+    tasks = [(entry, sf) for entry in entries]
+
+    # xlsx أصلاً مضغوط -> ZIP_STORED (من غير ضغط تاني على الـ CPU)
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as zf:
+        if workers <= 1 or len(tasks) <= 1:
+            for entry, task in zip(entries, tasks):
+                zf.write(_build_entry(task), entry.arcname)
+            return len(entries)
+
+        import django
+        from concurrent.futures import ProcessPoolExecutor
+
+        # ✅ الـ workers ما يورثوش connection الـ DB بتاعة الـ process الأب (fork)
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=django.setup) as pool:
+            for entry, path in zip(entries, pool.map(_build_entry, tasks)):
+                zf.write(path, entry.arcname)
+
+    return len(entries)
+
+
+def _write_pack(path: str, sf: str, workers: int):
+    with open(path, "wb") as f:
+        build_pack(f, sf=sf, workers=workers)
+
+
+def build_cached_pack(sf: str = "active", workers: int = 1):
+    """الحزمة في الكاش للإصدار الحالي (بتتبني مرة واحدة بس لو مش موجودة)."""
+    return get_or_build_file("pack", {"sf": sf}, lambda path: _write_pack(path, sf, workers), suffix=".zip")
+
+
+def cached_pack(sf: str = "active"):
+    """(مسار الحزمة الجاهزة أو None، وهل فيه build شغال لها)."""
+    return cached_path("pack", {"sf": sf}, suffix=".zip")
+
+
+def _build_in_background(sf: str):
+    close_old_connections()
+    try:
+        build_cached_pack(sf, workers=1)
+    finally:
+        # connections الـ thread ده بس (الـ connections per-thread)
+        connections.close_all()
+
+
+def start_pack_build(sf: str = "active") -> Optional[threading.Thread]:
+    """
+    يبني الحزمة في thread في الخلفية (worker واحد: من غير fork جوه gunicorn).
+    لو فيه build شغال لنفس الحزمة مش بيبدأ تاني.
+    """
+    path, building = cached_pack(sf)
+    if path is not None or building:
+        return None
+    thread = threading.Thread(target=_build_in_background, args=(sf,), name=f"export-pack-{sf}", daemon=True)
+    thread.start()
+    return thread
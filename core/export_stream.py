@@ -0,0 +1,99 @@
+# =========================================
+# file: core/export_stream.py
+# =========================================
+"""
+تصدير خام (CSV / NDJSON) للأنظمة التانية - نفس فلاتر export.xlsx وexport-department.xlsx.
+- الصفوف بتتكتب وهي بتتقرا (StreamingHttpResponse) -> أول bytes بتطلع فورًا
+- القراءة على دفعات بالـ id (keyset): كل دفعة = query للأبحاث + query لروابطها،
+  فالذاكرة ثابتة مهما كان حجم الداتا
+"""
+import csv
+import json
+from collections import defaultdict
+
+from core.exporters import ITERATOR_CHUNK_SIZE
+from core.models import ResearchSupervision
+
+
+FIELDS = [
+    "research_id",
+    "researcher_name",
+    "researcher_type",
+    "degree",
+    "status",
+    "title",
+    "supervisors",
+    "supervisor_departments",
+]
+
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+NDJSON_CONTENT_TYPE = "application/x-ndjson; charset=utf-8"
+
+
+def iter_research_records(researches, chunk_size: int = ITERATOR_CHUNK_SIZE):
+    """
+    (id, الاسم, النوع, المرحلة, الحالة, العنوان, [(اسم المشرف, قسمه)]) مرتبة بالـ id.
+    mysqlclient بيحمّل نتيجة الـ query كلها في الذاكرة حتى مع iterator()،
+    علشان كده القراءة بدفعات id > آخر id بدل cursor واحد على الجدول كله.
+    """
+    last_id = 0
+    while True:
+        chunk = list(
+            researches.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "researcher_name", "researcher_type", "degree", "status", "title")[:chunk_size]
+        )
+        if not chunk:
+            return
+
+        ids = [row[0] for row in chunk]
+        links = defaultdict(list)
+        for rid, sup_name, dept_name in (
+            ResearchSupervision.objects.filter(research_id__in=ids)
+            .order_by("research_id", "supervisor__name")
+            .values_list("research_id", "supervisor__name", "supervisor__department__name")
+        ):
+            links[rid].append((sup_name, dept_name))
+
+        for row in chunk:
+            yield row + (links.get(row[0], []),)
+
+        if len(chunk) < chunk_size:
+            return
+        last_id = ids[-1]
+
+
+class _Echo:
+    """csv.writer بيكتب هنا وبيرجّع السطر نفسه (بدل buffer)."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(researches):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for rid, name, rtype, degree, status, title, links in iter_research_records(researches):
+        yield writer.writerow([
+            rid,
+            name,
+            rtype,
+            degree,
+            status,
+            title or "",
+            " | ".join(sup for sup, _ in links),
+            " | ".join(dept or "" for _, dept in links),
+        ])
+
+
+def stream_ndjson(researches):
+    for rid, name, rtype, degree, status, title, links in iter_research_records(researches):
+        yield json.dumps({
+            "research_id": rid,
+            "researcher_name": name,
+            "researcher_type": rtype,
+            "degree": degree,
+            "status": status,
+            "title": title or "",
+            "supervisors": [{"name": sup, "department": dept} for sup, dept in links],
+        }, ensure_ascii=False) + "\n"
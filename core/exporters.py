@@ -1,38 +1,121 @@
-from datetime import datetime
+import pickle
+import tempfile
 from typing import Optional
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
 from openpyxl.utils import get_column_letter
 from django.db.models import Count, Q
 
-from core.models import Research, Supervisor, ResearchSupervision
+from core.models import Department, Research, Supervisor, ResearchSupervision
+from core.search import search_researches, search_supervisors
+from core.supervisor_load import with_load
 
 
 HEADER_FILL = PatternFill("solid", fgColor="1F4E79")
 HEADER_FONT = Font(color="FFFFFF", bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center", wrap_text=True)
 
 
-def _auto_fit(ws):
-    for col_cells in ws.columns:
-        max_len = 0
-        col = col_cells[0].column
-        for c in col_cells:
-            val = c.value
-            if val is None:
-                continue
-            max_len = max(max_len, len(str(val)))
-        ws.column_dimensions[get_column_letter(col)].width = min(max(12, max_len + 2), 60)
+ITERATOR_CHUNK_SIZE = 500
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 
+class SheetWriter:
+    """
+    شيت write-only (openpyxl) بعرض أعمدة على أطول قيمة في الشيت كله:
+    - openpyxl بيكتب <cols> (عرض الأعمدة) قبل أول صف، فالصفوف بتتكتب الأول في ملف spool مؤقت
+      (pickle صف صف) وأطول قيمة لكل عمود بتتحسب وإحنا ماشيين (ذاكرة = عدد الأعمدة بس)
+    - close(): العرض + الهيدر، وبعدين الصفوف من الـ spool للشيت
+    - widths ثابتة من الـ caller -> مفيش spool، الصفوف بتروح للشيت على طول
+    """
 
-def _apply_header(ws, row=1):
-    for cell in ws[row]:
-        cell.fill = HEADER_FILL
-        cell.font = HEADER_FONT
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = ws.dimensions
-    ws.sheet_view.rightToLeft = True
+    def __init__(self, wb: Workbook, title: str, headers, header_fill=HEADER_FILL, header_font=HEADER_FONT,
+                 header_alignment=HEADER_ALIGNMENT, min_width: int = 12, max_width: int = 60,
+                 rtl: bool = True, freeze: bool = True, auto_filter: bool = True, widths=None):
+        self.ws = wb.create_sheet(title)
+        self.headers = list(headers)
+        self.header_fill = header_fill
+        self.header_font = header_font
+        self.header_alignment = header_alignment
+        self.min_width = min_width
+        self.max_width = max_width
+        self.rtl = rtl
+        self.freeze = freeze
+        self.auto_filter = auto_filter
+
+        self._rows_written = 0
+        self._spool = None
+        self._widths = [0] * len(self.headers)
+        if widths is not None:
+            self._widths = list(widths)
+            self._start()
+        else:
+            self._track(self.headers)
+            self._spool = tempfile.TemporaryFile()
+
+    def _track(self, row):
+        widths = self._widths
+        if len(row) > len(widths):
+            widths.extend([0] * (len(row) - len(widths)))
+        for i, val in enumerate(row):
+            if val is None:
+                continue
+            n = len(str(val))
+            if n > widths[i]:
+                widths[i] = n
+
+    def _start(self):
+        """عرض الأعمدة + الـ view + الهيدر (لازم قبل أول صف)."""
+        ws = self.ws
+        for i, w in enumerate(self._widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = min(max(self.min_width, w + 2), self.max_width)
+        if self.freeze:
+            ws.freeze_panes = "A2"
+        if self.rtl:
+            ws.sheet_view.rightToLeft = True
+
+        header = []
+        for h in self.headers:
+            cell = WriteOnlyCell(ws, value=h)
+            cell.fill = self.header_fill
+            cell.font = self.header_font
+            if self.header_alignment is not None:
+                cell.alignment = self.header_alignment
+            header.append(cell)
+        ws.append(header)
+
+    def append(self, row):
+        row = tuple(row)
+        if self._spool is None:
+            self.ws.append(row)
+        else:
+            self._track(row)
+            pickle.dump(row, self._spool, pickle.HIGHEST_PROTOCOL)
+        self._rows_written += 1
+
+    def _replay(self):
+        spool, self._spool = self._spool, None
+        try:
+            spool.seek(0)
+            while True:
+                try:
+                    row = pickle.load(spool)
+                except EOFError:
+                    break
+                self.ws.append(row)
+        finally:
+            spool.close()
+
+    def close(self):
+        if self._spool is not None:
+            self._start()
+            self._replay()
+        if self.auto_filter:
+            last_col = get_column_letter(max(len(self.headers), len(self._widths), 1))
+            self.ws.auto_filter.ref = f"A1:{last_col}{self._rows_written + 1}"
 
 
 def _status_filter_q(sf: str):
@@ -68,17 +151,91 @@ def _status_filter_q(sf: str):
     return ~Q(status__in=excluded_for_active_only), "active"
 
 
+def export_researches_qs(q: str = "", supervisor_id: Optional[str] = None, sf: str = "active"):
+    """الأبحاث بفلاتر export.xlsx (q + supervisor_id + sf) -> (queryset, sf بعد التنظيف)."""
+    status_filter, sf = _status_filter_q(sf)
+
+    researches = Research.objects.all().filter(status_filter)
+
+    if q:
+        researches = search_researches(researches, q)
+
+    if supervisor_id:
+        researches = researches.filter(researchsupervision__supervisor_id=int(supervisor_id))
+
+    return researches.distinct(), sf
+
+
+def department_researches_qs(dept: Department, sf: str = "active"):
+    """الأبحاث المرتبطة بمشرفين القسم (حسب sf) -> (queryset, sf بعد التنظيف)."""
+    status_filter, sf = _status_filter_q(sf)
+
+    dept_supervisors = Supervisor.objects.filter(department=dept, is_active=True)
+    researches = (
+        Research.objects.filter(researchsupervision__supervisor__in=dept_supervisors)
+        .filter(status_filter)
+        .distinct()
+    )
+    return researches, sf
+
+
+TYPE_LABELS = dict(Research.ResearcherType.choices)
+DEGREE_LABELS = dict(Research.Degree.choices)
+STATUS_LABELS = dict(Research.Status.choices)
+
+
+def iter_research_export_rows(researches):
+    """
+    صفوف شيت Researches كـ tuples في عدد ثابت من الـ queries (2):
+    - query للأبحاث (أعمدة الشيت بس) مرتبة بالـ id
+    - query للروابط (اسم المشرف + قسمه) مرتبة بـ (research_id, اسم المشرف)
+    والاتنين بيتدمجوا (merge join) وهما ماشيين، من غير query لكل بحث.
+    """
+    research_rows = (
+        researches.order_by("id")
+        .values_list("id", "researcher_name", "researcher_type", "degree", "status", "title")
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    link_rows = (
+        ResearchSupervision.objects.filter(research_id__in=researches.values("id"))
+        .order_by("research_id", "supervisor__name")
+        .values_list("research_id", "supervisor__name", "supervisor__department__name")
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE * 4)
+    )
+
+    pending = next(link_rows, None)
+    for rid, name, rtype, degree, status, title in research_rows:
+        # روابط أبحاث مش في النتيجة (مش المفروض تحصل) بتتخطى
+        while pending is not None and pending[0] < rid:
+            pending = next(link_rows, None)
+
+        sup_names, sup_depts = [], []
+        while pending is not None and pending[0] == rid:
+            sup_names.append(pending[1])
+            sup_depts.append(pending[2] or "—")
+            pending = next(link_rows, None)
+
+        yield (
+            rid,
+            name,
+            TYPE_LABELS.get(rtype, rtype),
+            DEGREE_LABELS.get(degree, degree),
+            STATUS_LABELS.get(status, status),
+            title,
+            " | ".join(sup_names),
+            " | ".join(sup_depts),
+        )
+
+
 def build_export_workbook(q: str = "", supervisor_id: Optional[str] = None, sf: str = "active") -> Workbook:
-    wb = Workbook()
+    # ✅ write-only: الصفوف بتتكتب في ملف الشيت المؤقت أول بأول بدل ما الـ workbook كله يبقى في الذاكرة
+    wb = Workbook(write_only=True)
 
     status_filter, sf = _status_filter_q(sf)
 
     # -----------------------------------
     # شيت 1: Researches
     # -----------------------------------
-    ws1 = wb.active
-    ws1.title = "Researches"
-
     headers = [
         "Research ID",
         "اسم الباحث",
@@ -88,54 +245,24 @@ def build_export_workbook(q: str = "", supervisor_id: Optional[str] = None, sf:
         "عنوان البحث",
         "المشرفون",
         "قسم المشرف (إن وجد)",
-        "تاريخ التصدير",
         "فلتر التصدير (sf)",
     ]
-    ws1.append(headers)
+    ws1 = SheetWriter(wb, "Researches", headers)
 
-    researches = Research.objects.all().filter(status_filter)
+    researches, _ = export_researches_qs(q, supervisor_id, sf)
 
-    if q:
-        researches = researches.filter(Q(researcher_name__icontains=q) | Q(title__icontains=q))
+    # ✅ من غير عمود "تاريخ التصدير": الملف بيتخزن في الكاش لحد ما الداتا تتغير،
+    # فوقت البناء مش وقت التنزيل (التاريخ في اسم الملف وقت التنزيل)
+    for row in iter_research_export_rows(researches):
+        ws1.append(row + (sf,))
 
-    if supervisor_id:
-        researches = researches.filter(researchsupervision__supervisor_id=int(supervisor_id))
-
-    researches = researches.distinct().prefetch_related("researchsupervision_set__supervisor__department")
-
-    export_time = datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    for r in researches:
-        links = list(
-            ResearchSupervision.objects.filter(research=r)
-            .select_related("supervisor__department")
-            .order_by("supervisor__name")
-        )
-        sup_names = " | ".join([l.supervisor.name for l in links])
-        sup_depts = " | ".join([(l.supervisor.department.name if l.supervisor.department else "—") for l in links])
-
-        ws1.append([
-            r.id,
-            r.researcher_name,
-            r.get_researcher_type_display(),
-            r.get_degree_display(),
-            r.get_status_display(),
-            r.title,
-            sup_names,
-            sup_depts,
-            export_time,
-            sf,
-        ])
-
-    _apply_header(ws1)
-    _auto_fit(ws1)
+    ws1.close()
 
     # -----------------------------------
     # شيت 2: Supervisors Summary
     # (✅ بدون عمود "إجمالي الروابط")
     # -----------------------------------
-    ws2 = wb.create_sheet("Supervisors Summary")
-    ws2.append([
+    ws2 = SheetWriter(wb, "Supervisors Summary", [
         "Supervisor ID",
         "اسم المشرف",
         "القسم",
@@ -146,62 +273,20 @@ def build_export_workbook(q: str = "", supervisor_id: Optional[str] = None, sf:
         "فلتر التصدير (sf)",
     ])
 
-    # علشان summary يراعي sf: لازم يكون في filter على researches__status
-    if sf == "discussed":
-        status_q = Q(researches__status=Research.Status.DISCUSSED)
-    elif sf == "dismissed":
-        status_q = Q(researches__status=Research.Status.DISMISSED)
-    elif sf == "all":
-        status_q = Q()
-    elif sf == "active_discussed":
-        status_q = ~Q(researches__status__in=[Research.Status.DISMISSED, Research.Status.CANCELLED])
-    else:
-        status_q = ~Q(researches__status__in=[Research.Status.DISCUSSED, Research.Status.DISMISSED, Research.Status.CANCELLED])
-
+    # ✅ العدادات من SupervisorLoad (bucket = sf)
     supervisors = (
-        Supervisor.objects.filter(is_active=True)
-        .select_related("department")
-        .annotate(
-            ma_count=Count(
-                "researches",
-                filter=(
-                    Q(researches__researcher_type=Research.ResearcherType.RESEARCHER)
-                    & Q(researches__degree=Research.Degree.MA)
-                    & status_q
-                ),
-                distinct=True,
-            ),
-            phd_count=Count(
-                "researches",
-                filter=(
-                    Q(researches__researcher_type=Research.ResearcherType.RESEARCHER)
-                    & Q(researches__degree=Research.Degree.PHD)
-                    & status_q
-                ),
-                distinct=True,
-            ),
-            researchers_total=Count(
-                "researches",
-                filter=(Q(researches__researcher_type=Research.ResearcherType.RESEARCHER) & status_q),
-                distinct=True,
-            ),
-            assistants_count=Count(
-                "researches",
-                filter=(Q(researches__researcher_type=Research.ResearcherType.ASSISTANT) & status_q),
-                distinct=True,
-            ),
-        )
+        with_load(Supervisor.objects.filter(is_active=True).select_related("department"), sf)
         .order_by("-researchers_total", "name")
     )
 
     if q:
-        supervisors = supervisors.filter(name__icontains=q)
+        supervisors = search_supervisors(supervisors, q)
 
     # لو supervisor_id موجود: نطلع صف واحد للمشرف ده
     if supervisor_id:
         supervisors = supervisors.filter(id=int(supervisor_id))
 
-    for s in supervisors:
+    for s in supervisors.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
         ws2.append([
             s.id,
             s.name,
@@ -213,14 +298,12 @@ def build_export_workbook(q: str = "", supervisor_id: Optional[str] = None, sf:
             sf,
         ])
 
-    _apply_header(ws2)
-    _auto_fit(ws2)
+    ws2.close()
 
     # -----------------------------------
     # شيت 3: Stats (طبق sf على الإحصائيات)
     # -----------------------------------
-    ws3 = wb.create_sheet("Stats")
-    ws3.append(["البند", "القيمة", "الإجمالي", "فلتر التصدير (sf)"])
+    ws3 = SheetWriter(wb, "Stats", ["البند", "القيمة", "الإجمالي", "فلتر التصدير (sf)"])
 
     base = Research.objects.filter(status_filter)
 
@@ -242,7 +325,41 @@ def build_export_workbook(q: str = "", supervisor_id: Optional[str] = None, sf:
     for x in by_type:
         ws3.append(["نوع", x["researcher_type"], x["total"], sf])
 
-    _apply_header(ws3)
-    _auto_fit(ws3)
+    ws3.close()
+
+    return wb
+
+
+DEPT_HEADER_FILL = PatternFill(start_color="1a4f9c", end_color="1a4f9c", fill_type="solid")
+
+
+def build_department_workbook(dept: Department, sf: str = "active") -> Workbook:
+    """
+    Excel قسم واحد: الأبحاث المرتبطة بمشرفين القسم (حسب sf).
+    """
+    researches, sf = department_researches_qs(dept, sf)
+    researches = researches.prefetch_related("researchsupervision_set__supervisor")
+
+    wb = Workbook(write_only=True)
+    ws = SheetWriter(
+        wb,
+        f"{dept.name}",
+        ["#", "اسم الباحث", "النوع", "الدرجة", "عنوان الرسالة", "المشرفون", "الحالة"],
+        header_fill=DEPT_HEADER_FILL,
+        header_font=HEADER_FONT,
+        header_alignment=None,
+        min_width=0,
+        max_width=50,
+        rtl=False,
+        freeze=False,
+        auto_filter=False,
+    )
+
+    for idx, research in enumerate(researches.iterator(chunk_size=ITERATOR_CHUNK_SIZE), start=1):
+        supervisors = ", ".join([link.supervisor.name for link in research.researchsupervision_set.all()])
+        researcher_type = "معيد" if research.researcher_type == Research.ResearcherType.ASSISTANT else "باحث"
+        degree = "دكتوراه" if research.degree == Research.Degree.PHD else "ماجستير"
+        ws.append([idx, research.researcher_name, researcher_type, degree, research.title or "", supervisors, research.get_status_display()])
 
-    return wb
\ No newline at end of file
+    ws.close()
+    return wb
@@ -0,0 +1,114 @@
+# =========================================
+# file: core/fees.py
+# =========================================
+"""
+مصفوفة المصروفات (الباحثين × السنين) للشؤون المالية:
+- query واحدة للباحثين + query واحدة على ResearchFeePayment (research_id IN subquery)
+  والـ pivot في الذاكرة، بدل get_fees_status لكل صف
+- الفلتر دفع/لم يدفع لسنة معينة بيتعمل في SQL على الباحثين قبل القراءة
+- السنة اللي ملهاش سجل = لم يدفع (نفس Research.get_fees_status)
+- provision_fee_year: صفوف السنة الجديدة لكل الباحثين الحاليين مرة واحدة (بداية كل سنة)
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.utils import timezone
+
+from core.models import Research, ResearchFeePayment
+
+
+PAID = "paid"
+UNPAID = "unpaid"
+MISSING = ""          # مفيش سجل للسنة دي (بيتحسب لم يدفع)
+
+FEE_FILTERS = (PAID, UNPAID)
+
+ROW_FIELDS = ("id", "researcher_name", "degree", "researcher_type", "status")
+
+
+class FeeMatrix(NamedTuple):
+    years: List[int]
+    rows: List[dict]                      # ROW_FIELDS + "cells" (حالة لكل سنة بنفس ترتيب years)
+    totals: List[Dict[str, int]]          # لكل سنة (بنفس الترتيب): {"year", "paid", "unpaid"}
+
+
+def filter_by_fee_status(researches, year: int, fee_status: Optional[str]):
+    """الباحثين اللي دفعوا (أو ما دفعوش) سنة year."""
+    if fee_status not in FEE_FILTERS:
+        return researches
+    paid_ids = ResearchFeePayment.objects.filter(year=int(year), is_paid=True).values("research_id")
+    if fee_status == PAID:
+        return researches.filter(id__in=paid_ids)
+    return researches.exclude(id__in=paid_ids)
+
+
+def fee_matrix(researches, years: Optional[Iterable[int]] = None) -> FeeMatrix:
+    """
+    researches = queryset متفلتر (نطاق القسم/الحالة/البحث).
+    years = الأعمدة الإضافية اللي لازم تظهر حتى لو مفيهاش سجلات (السنة الحالية / سنة الفلتر).
+    """
+    rows = list(researches.order_by("researcher_name", "id").values(*ROW_FIELDS))
+
+    status: Dict[int, Dict[int, str]] = {}
+    all_years = set(int(y) for y in (years or ()))
+    payments = ResearchFeePayment.objects.filter(
+        research_id__in=researches.order_by().values("id"),
+    ).values_list("research_id", "year", "is_paid")
+    for research_id, year, is_paid in payments:
+        status.setdefault(research_id, {})[year] = PAID if is_paid else UNPAID
+        all_years.add(year)
+
+    year_list = sorted(all_years)
+    totals = [{"year": year, PAID: 0, UNPAID: 0} for year in year_list]
+    for row in rows:
+        by_year = status.get(row["id"], {})
+        row["cells"] = [by_year.get(year, MISSING) for year in year_list]
+        for total, cell in zip(totals, row["cells"]):
+            total[PAID if cell == PAID else UNPAID] += 1
+
+    return FeeMatrix(year_list, rows, totals)
+
+
+def active_researchers():
+    """الباحثين (مش المعيدين) الحاليين - نفس sf=active."""
+    return Research.objects.filter(researcher_type=Research.ResearcherType.RESEARCHER).exclude(
+        status__in=[Research.Status.DISCUSSED, Research.Status.DISMISSED, Research.Status.CANCELLED]
+    )
+
+
+def _insert_fee_rows(year: int, research_ids: List[int]) -> int:
+    """
+    INSERT IGNORE لدفعة واحدة وبيرجّع عدد الصفوف اللي اتعملت فعلاً:
+    bulk_create(ignore_conflicts) بيرجّع كل الـ objects حتى اللي اتجاهلت (و MySQL مش بيرجّع ids)،
+    فالعدد = صفوف الدفعة دي في السنة بعد الـ INSERT - قبله (toggle في نفس الوقت بيتحسب قبله).
+    """
+    existing = ResearchFeePayment.objects.filter(year=year, research_id__in=research_ids)
+    before = existing.count()
+    ResearchFeePayment.objects.bulk_create(
+        [ResearchFeePayment(research_id=research_id, year=year, is_paid=False) for research_id in research_ids],
+        ignore_conflicts=True,
+    )
+    return existing.count() - before
+
+
+def provision_fee_year(year: Optional[int] = None, researches=None, batch_size: int = 1000) -> int:
+    """
+    صف "لم يدفع" لسنة year (الافتراضي: السنة الحالية) لكل بحث مالوش صف فيها
+    (researches = active_researchers() لو None). INSERT بالجملة بيتجاهل التعارض،
+    فلو اتنادت مرتين (أو مع toggle في نفس الوقت) مفيش حاجة بتتكرر.
+    بيرجّع عدد الصفوف اللي اتعملت فعلاً (من غير اللي اتجاهلت كتعارض).
+    """
+    year = int(year or timezone.localdate().year)
+    if researches is None:
+        researches = active_researchers()
+
+    missing = researches.exclude(fee_payments__year=year).order_by("id").values_list("id", flat=True)
+    created = 0
+    batch = []
+    for research_id in missing.iterator(chunk_size=batch_size):
+        batch.append(research_id)
+        if len(batch) >= batch_size:
+            created += _insert_fee_rows(year, batch)
+            batch = []
+    if batch:
+        created += _insert_fee_rows(year, batch)
+    return created
@@ -0,0 +1,150 @@
+# =========================================
+# file: core/import_jobs.py
+# =========================================
+"""
+استيراد Excel من الويب في الخلفية (بدون broker خارجي):
+- الـ view بيخزن الملف ويعمل ImportJob ويرجع فورًا
+- thread في نفس الـ process بيشغّل نفس منطق import_supervisions
+- التقدم بيتكتب في ImportJob وصفحة الرفع بتسأل عليه (JSON)
+- استيراد واحد بس في نفس الوقت (ويب أو CLI): الـ job بياخد import_lock (ImportLock) قبل load()،
+  ولو مشغول الـ job بيفشل برسالة بدل ما اتنين يكتبوا مع بعض (تكرار/IntegrityError)
+"""
+import os
+import threading
+import traceback
+from typing import Optional
+
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.importers import (
+    IMPORT_LOCK_STALE_AFTER,
+    BulkImporter,
+    ImportLocked,
+    import_lock,
+    open_sheet,
+    prepare_import,
+    record_fingerprints,
+    split_unchanged,
+)
+from core.models import ImportJob
+
+
+def _update(job_id: int, **fields):
+    ImportJob.objects.filter(pk=job_id).update(**fields)
+
+
+def active_import_job(exclude_id: Optional[int] = None) -> Optional[ImportJob]:
+    """الـ job اللي شغال (أو مستني يبدأ) دلوقتي لو فيه - job أقدم من مدة القفل بيعتبر مات."""
+    since = timezone.now() - IMPORT_LOCK_STALE_AFTER
+    qs = ImportJob.objects.filter(
+        Q(status=ImportJob.Status.RUNNING, started_at__gte=since)
+        | Q(status=ImportJob.Status.PENDING, created_at__gte=since)
+    )
+    if exclude_id is not None:
+        qs = qs.exclude(pk=exclude_id)
+    return qs.order_by("id").first()
+
+
+def _run(job: ImportJob):
+    job_id = job.pk
+    _update(job_id, status=ImportJob.Status.RUNNING, started_at=timezone.now())
+
+    rows = open_sheet(job.file.path, sheet=job.sheet or None)
+    try:
+        batch = prepare_import(rows)
+    finally:
+        rows.close()
+
+    if job.full:
+        rows, unchanged = batch.rows, 0
+    else:
+        rows, unchanged = split_unchanged(batch.rows)
+    _update(job_id, rows_total=len(rows), rows_rejected=len(batch.rejected), rows_unchanged=unchanged)
+
+    importer = BulkImporter()
+    importer.load()
+
+    def progress(processed):
+        _update(
+            job_id,
+            rows_processed=processed,
+            created_research=importer.created_research,
+            created_supervisors=importer.created_supervisors,
+            merged_duplicates=importer.merged_duplicates,
+        )
+
+    importer.feed_all(rows, progress=progress)
+
+    with transaction.atomic():
+        importer.flush()
+        record_fingerprints(rows)
+
+    _update(
+        job_id,
+        status=ImportJob.Status.DONE,
+        created_research=importer.created_research,
+        created_supervisors=importer.created_supervisors,
+        created_links=importer.created_links,
+        merged_duplicates=importer.merged_duplicates,
+        finished_at=timezone.now(),
+    )
+
+
+def run_import_job(job_id: int):
+    """
+    تشغيل الـ job (sync). الـ thread بيناديها، وممكن تتنادي مباشرة في التجربة/shell.
+
+    الـ feed كله في الذاكرة، فالتقدم بيتكتب (autocommit) وبيبان للـ poller،
+    والكتابة الفعلية للداتا في transaction واحدة في الآخر.
+    """
+    close_old_connections()
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+        with import_lock(f"job #{job_id} {job.original_name} (pid {os.getpid()})"):
+            _run(job)
+    except ImportLocked as e:
+        _update(job_id, status=ImportJob.Status.FAILED, error=str(e), finished_at=timezone.now())
+    except Exception as e:
+        _update(
+            job_id,
+            status=ImportJob.Status.FAILED,
+            error=f"{e}\n\n{traceback.format_exc()}",
+            finished_at=timezone.now(),
+        )
+    finally:
+        connections.close_all()
+
+
+def start_import_job(job: ImportJob):
+    """يشغّل الـ job في thread بعد ما الـ request transaction تتعمل commit."""
+    def _start():
+        threading.Thread(
+            target=run_import_job,
+            args=(job.pk,),
+            name=f"import-job-{job.pk}",
+            daemon=True,
+        ).start()
+
+    transaction.on_commit(_start)
+
+
+def job_progress(job: ImportJob) -> dict:
+    return {
+        "id": job.pk,
+        "file": job.original_name,
+        "full": job.full,
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "rows_total": job.rows_total,
+        "rows_processed": job.rows_processed,
+        "rows_rejected": job.rows_rejected,
+        "rows_unchanged": job.rows_unchanged,
+        "created_research": job.created_research,
+        "created_supervisors": job.created_supervisors,
+        "created_links": job.created_links,
+        "merged_duplicates": job.merged_duplicates,
+        "error": job.error.split("\n\n", 1)[0] if job.error else "",
+        "done": job.status in (ImportJob.Status.DONE, ImportJob.Status.FAILED),
+    }
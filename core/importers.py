@@ -0,0 +1,875 @@
+# =========================================
+# file: core/importers.py
+# =========================================
+import re
+import hashlib
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from core.data_version import bump_data_version
+from core.near_duplicates import flag_near_duplicates
+from core.research_scope import refresh_research_scopes, refresh_supervisor_research_scopes
+from core.search import index_researches, index_supervisors
+from core.supervisor_load import refresh_supervisor_loads
+from core.models import Department, ImportLock, ImportRowFingerprint, Supervisor, Research, ResearchSupervision, compute_title_hash
+
+
+BATCH_SIZE = 500
+
+
+def normalize_text(x) -> str:
+    # x != x -> NaN
+    if x is None or (isinstance(x, float) and x != x):
+        return ""
+    return str(x).strip()
+
+
+def normalize_spaces(s: str) -> str:
+    s = normalize_text(s)
+    s = re.sub(r"\s+", " ", s)
+    return s.strip()
+
+
+def title_to_hash(title: str) -> str:
+    # ✅ نفس دالة الموديل (Research.save / bulk writes)
+    return compute_title_hash(normalize_text(title))
+
+
+def map_degree(raw: str) -> str:
+    raw = normalize_spaces(raw)
+    if any(k in raw.lower() for k in ["دكتور", "دكتورا", "phd", "p.h.d"]):
+        return Research.Degree.PHD
+    return Research.Degree.MA
+
+
+def map_researcher_type(raw: str) -> str:
+    t = normalize_spaces(raw)
+    if "معيد" in t:
+        return Research.ResearcherType.ASSISTANT
+    return Research.ResearcherType.RESEARCHER
+
+
+def map_status(raw):
+    s = normalize_spaces(raw)
+    if not s:
+        return Research.Status.REGISTERED, "", None
+
+    if "مسجل" in s:
+        return Research.Status.REGISTERED, "", None
+    if any(k in s for k in ["ناقش", "مناقش", "نوقش", "تمت المناقشة"]):
+        return Research.Status.DISCUSSED, s, None
+    if any(k in s for k in ["الغاء", "إلغاء"]):
+        return Research.Status.CANCELLED, s, None
+    if "فصل" in s:
+        return Research.Status.DISMISSED, s, None
+
+    return Research.Status.OTHER, s, None
+
+
+def split_supervisors(cell: str) -> List[str]:
+    """
+    ✅ لو الخلية فيها أكتر من مشرف:
+    - نفصل على (،) أو , أو ; أو / أو سطر جديد أو " - " أو " و "
+    """
+    s = normalize_spaces(cell)
+    if not s:
+        return []
+    parts = re.split(r"[،,;/\n]+|\s+-\s+|\s+و\s+", s)
+    out = []
+    for p in parts:
+        p = normalize_spaces(p)
+        if p:
+            out.append(p)
+
+    # de-dup preserve order
+    seen = set()
+    uniq = []
+    for n in out:
+        if n not in seen:
+            seen.add(n)
+            uniq.append(n)
+    return uniq
+
+
+def find_header_row(rows: Sequence[Sequence], expected: Iterable[str], max_scan_rows: int = 30) -> Optional[int]:
+    expected_set = set(expected)
+    for i in range(min(max_scan_rows, len(rows))):
+        row_norm = {normalize_spaces(x) for x in rows[i]}
+        hits = len(expected_set.intersection(row_norm))
+        if hits >= 2:
+            return i
+    return None
+
+
+class SheetRows:
+    """
+    قارئ Excel بالـ streaming (openpyxl read-only):
+    - بيقرأ أول صفوف بس علشان يحدد سطر الهيدر (نفس find_header_row)
+    - بعد كده بيطلع الصفوف tuples واحدة واحدة بدون ما يحمّل الشيت كله في الذاكرة
+
+    columns: اسم العمود (بعد normalize_spaces) -> index
+    """
+
+    def __init__(self, path: str, sheet: Optional[str] = None, expected: Iterable[str] = (),
+                 header_row: Optional[int] = None, max_scan_rows: int = 30):
+        self.wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = self._worksheet(sheet)
+            self._rows = ws.iter_rows(min_row=1, values_only=True)
+
+            # نخزن أول صفوف بس لحد سطر الهيدر
+            scan_until = max_scan_rows if header_row is None else header_row + 1
+            head = []
+            for row in self._rows:
+                head.append(row)
+                if len(head) >= scan_until:
+                    break
+
+            if header_row is None:
+                header_row = find_header_row(head, expected, max_scan_rows)
+            if header_row is None or header_row >= len(head):
+                raise ValueError(
+                    "Could not detect header row. Please pass --header_row N (0-based). "
+                    f"Expected columns like: {list(expected)}"
+                )
+        except Exception:
+            self.wb.close()
+            raise
+
+        self.header_row = header_row
+        self.columns: Dict[str, int] = {}
+        for idx, name in enumerate(head[header_row]):
+            name = normalize_spaces(name)
+            if name and name not in self.columns:
+                self.columns[name] = idx
+
+        # الصفوف اللي اتقرت بعد الهيدر أثناء البحث عنه
+        self._buffered = head[header_row + 1:]
+
+        self._next_line = len(head) + 1
+
+    def _worksheet(self, sheet: Optional[str]):
+        if not sheet:
+            return self.wb.worksheets[0]
+        if sheet in self.wb.sheetnames:
+            return self.wb[sheet]
+        # أسماء الشيتات أحيانًا فيها مسافات زيادة ("اشرافات ")
+        for name in self.wb.sheetnames:
+            if normalize_spaces(name) == normalize_spaces(sheet):
+                return self.wb[name]
+        raise KeyError(f"Worksheet {sheet} does not exist.")
+
+    def __iter__(self) -> Iterator[tuple]:
+        for _, row in self.numbered():
+            yield row
+
+    def numbered(self) -> Iterator[Tuple[int, tuple]]:
+        """نفس الصفوف + رقم السطر في Excel (1-based) علشان تقرير الصفوف المرفوضة."""
+        try:
+            line = self.header_row + 2
+            for row in self._buffered:
+                if any(v is not None for v in row):
+                    yield line, row
+                line += 1
+            self._buffered = []
+
+            line = self._next_line
+            for row in self._rows:
+                # drop empty rows
+                if any(v is not None for v in row):
+                    yield line, row
+                line += 1
+        finally:
+            self.close()
+
+    def close(self):
+        self.wb.close()
+
+
+class ImportRow(NamedTuple):
+    """صف واحد بعد التنظيف (جاهز للدمج مع الداتابيز)."""
+    researcher_name: str
+    title: str
+    degree: str
+    researcher_type: str
+    status: str
+    status_note: str
+    status_date: object
+    supervisor_names: List[str]
+    supervisor_dept_name: str
+    # رقم السطر في Excel (للـ checkpoints والتقارير)
+    line: int = 0
+
+
+ResearchKey = Tuple[str, str, str, str]
+
+
+# ✅ أسماء الأعمدة الافتراضية (بعد ما نحدد سطر الهيدر)
+DEFAULT_COLUMNS = {
+    "col_degree": "المرحلة",
+    "col_name": "الإســـــــم",
+    "col_title": "العنـــــــــوان",
+    "col_supervisor": "المشرفين",
+    # ✅ القسم في الشيت = قسم المشرف
+    "col_supervisor_dept": "القسم",
+    "col_status": "الحالة",
+    # ✅ النوع (باحث/معيد)
+    "col_type": "النوع",
+}
+
+REQUIRED_COLUMNS = ["col_degree", "col_name", "col_title", "col_supervisor"]
+
+
+def open_sheet(path: str, sheet: Optional[str] = None, header_row: Optional[int] = None,
+               columns: Optional[Dict[str, str]] = None) -> SheetRows:
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    required = [columns[c] for c in REQUIRED_COLUMNS]
+
+    rows = SheetRows(path, sheet=sheet, expected=required, header_row=header_row)
+
+    missing = [c for c in required if c not in rows.columns]
+    if missing:
+        rows.close()
+        raise ValueError(f"Missing columns in Excel: {missing}\nAvailable columns: {list(rows.columns)}")
+    return rows
+
+
+class RejectedRow(NamedTuple):
+    line: int
+    reason: str
+    researcher_name: str
+
+
+class ImportBatch(NamedTuple):
+    rows: List[ImportRow]
+    rejected: List[RejectedRow]
+
+
+class MemoColumnNormalizer:
+    """
+    pre-pass عمود بعمود مع memo (مش vectorized):
+    - كل عمود في الدفعة بيتسحب مرة واحدة، والدوال (map_degree/split_supervisors/...) بتتنادى
+      على القيم المختلفة بس - كل قيمة جديدة مرة واحدة، والباقي lookup في dict
+      (المرحلة/النوع/الحالة/القسم/المشرفين قيمهم بتتكرر آلاف المرات، فعدد النداءات = عدد القيم المختلفة)
+    - مفيش pandas/numpy: الخلايا نصوص عربي بقواعد keyword، والـ memo بيشيل نفس الشغل
+      من غير dependency ولا تحويل الشيت لـ DataFrame
+    - الصفوف الناقصة بتطلع في تقرير (RejectedRow) بدل ما تتخطى بصمت
+    """
+
+    def __init__(self, sheet_columns: Dict[str, int], columns: Optional[Dict[str, str]] = None):
+        columns = {**DEFAULT_COLUMNS, **(columns or {})}
+        self.index = {key: sheet_columns.get(name) for key, name in columns.items()}
+        self._memo: Dict[str, dict] = {key: {} for key in columns}
+
+    def _memo_column(self, raw_rows: Sequence[tuple], key: str, fn) -> list:
+        idx = self.index[key]
+        if idx is None:
+            return [fn(None)] * len(raw_rows)
+
+        memo = self._memo[key]
+        out = []
+        for row in raw_rows:
+            v = row[idx] if idx < len(row) else None
+            try:
+                out.append(memo[v])
+            except KeyError:
+                memo[v] = mapped = fn(v)
+                out.append(mapped)
+        return out
+
+    def prepare(self, numbered_rows: Sequence[Tuple[int, tuple]]) -> ImportBatch:
+        if not numbered_rows:
+            return ImportBatch([], [])
+        lines = [line for line, _ in numbered_rows]
+        raw_rows = [row for _, row in numbered_rows]
+
+        names = self._memo_column(raw_rows, "col_name", normalize_spaces)
+        titles = self._memo_column(raw_rows, "col_title", normalize_spaces)
+        supervisors = self._memo_column(raw_rows, "col_supervisor", split_supervisors)
+        degrees = self._memo_column(raw_rows, "col_degree", map_degree)
+        types = self._memo_column(raw_rows, "col_type", map_researcher_type)
+        statuses = self._memo_column(raw_rows, "col_status", map_status)
+        depts = self._memo_column(raw_rows, "col_supervisor_dept", normalize_spaces)
+
+        rows: List[ImportRow] = []
+        rejected: List[RejectedRow] = []
+        for line, name, title, sups, degree, rtype, st, dept in zip(
+            lines, names, titles, supervisors, degrees, types, statuses, depts
+        ):
+            if not name:
+                rejected.append(RejectedRow(line, "missing researcher name", name))
+                continue
+            if not title:
+                rejected.append(RejectedRow(line, "missing title", name))
+                continue
+            if not sups:
+                rejected.append(RejectedRow(line, "missing supervisors", name))
+                continue
+
+            rows.append(ImportRow(
+                researcher_name=name,
+                title=title,
+                degree=degree,
+                researcher_type=rtype,
+                status=st[0],
+                status_note=st[1],
+                status_date=st[2],
+                # نسخة لكل صف (القائمة نفسها متشاركة في الـ memo)
+                supervisor_names=list(sups),
+                supervisor_dept_name=dept,
+                line=line,
+            ))
+        return ImportBatch(rows, rejected)
+
+
+def iter_import_batches(rows: SheetRows, columns: Optional[Dict[str, str]] = None,
+                        chunk_size: int = 1000) -> Iterator[ImportBatch]:
+    normalizer = MemoColumnNormalizer(rows.columns, columns)
+    chunk = []
+    for item in rows.numbered():
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield normalizer.prepare(chunk)
+            chunk = []
+    if chunk:
+        yield normalizer.prepare(chunk)
+
+
+def prepare_import(rows: SheetRows, columns: Optional[Dict[str, str]] = None) -> ImportBatch:
+    """
+    Pre-pass على الشيت كله قبل أي شغل على الداتابيز:
+    يرجّع الصفوف النظيفة + تقرير الصفوف المرفوضة مرة واحدة.
+    """
+    clean: List[ImportRow] = []
+    rejected: List[RejectedRow] = []
+    for batch in iter_import_batches(rows, columns):
+        clean.extend(batch.rows)
+        rejected.extend(batch.rejected)
+    return ImportBatch(clean, rejected)
+
+
+def iter_import_rows(rows: SheetRows, columns: Optional[Dict[str, str]] = None) -> Iterator[ImportRow]:
+    """
+    يحوّل صفوف الشيت لـ ImportRow (ويتخطى الصفوف الناقصة زي الأول).
+    """
+    for batch in iter_import_batches(rows, columns):
+        yield from batch.rows
+
+
+# -----------------------------------
+# Batch: ملفات/شيتات كتير
+# -----------------------------------
+def list_sheets(path: str) -> List[str]:
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def parse_sheet(path: str, sheet: Optional[str] = None, header_row: Optional[int] = None,
+                columns: Optional[Dict[str, str]] = None) -> ImportBatch:
+    """قراءة + تنظيف شيت واحد (بدون DB) - بتشتغل جوه worker process."""
+    rows = open_sheet(path, sheet=sheet, header_row=header_row, columns=columns)
+    try:
+        return prepare_import(rows, columns)
+    finally:
+        rows.close()
+
+
+def _parse_source(args):
+    path, sheet, header_row, columns = args
+    try:
+        return path, sheet, parse_sheet(path, sheet, header_row, columns), ""
+    except (ValueError, KeyError) as e:
+        return path, sheet, None, str(e)
+
+
+def parse_sources(sources: List[Tuple[str, Optional[str]]], header_row: Optional[int] = None,
+                  columns: Optional[Dict[str, str]] = None, workers: int = 1):
+    """
+    يقرأ كل (ملف، شيت) بالتوازي في processes منفصلة.
+    يرجّع [(path, sheet, ImportBatch أو None, error)] بنفس ترتيب sources.
+    """
+    tasks = [(path, sheet, header_row, columns) for path, sheet in sources]
+    if workers <= 1 or len(tasks) <= 1:
+        return [_parse_source(t) for t in tasks]
+
+    import django
+    from concurrent.futures import ProcessPoolExecutor
+
+    # django.setup علشان الـ workers يقدروا يستوردوا core.models (لو الـ start method = spawn)
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=django.setup) as pool:
+        return list(pool.map(_parse_source, tasks))
+
+
+def merge_rows(rows: Iterable[ImportRow]) -> Tuple[List[ImportRow], int]:
+    """
+    دمج الصفوف في الذاكرة بنفس مفتاح Research (الاسم، title_hash، المرحلة، النوع) قبل الـ DB:
+    - أي (مشرف + قسم) اتكرر لنفس المفتاح بيتشال (مالوش أثر في الاستيراد)
+    - الحالة (لو فيها note) بتتنقل لأول صف للمفتاح، زي قاعدة التحديث في BulkImporter
+    - الترتيب محفوظ، فالنتيجة هي نفس نتيجة feed لكل الصفوف واحد واحد
+
+    يرجّع (الصفوف بعد الدمج، عدد الصفوف اللي اتشالت بالكامل).
+    """
+    out: List[Optional[ImportRow]] = []
+    first_index: Dict[ResearchKey, int] = {}
+    seen_pairs: Dict[ResearchKey, set] = {}
+    dropped = 0
+
+    for row in rows:
+        key = (row.researcher_name, title_to_hash(row.title), row.degree, row.researcher_type)
+
+        if key not in first_index:
+            first_index[key] = len(out)
+            seen_pairs[key] = {(s, row.supervisor_dept_name) for s in row.supervisor_names}
+            out.append(row)
+            continue
+
+        idx = first_index[key]
+        first = out[idx]
+        if row.status_note and not first.status_note:
+            out[idx] = first._replace(status=row.status, status_note=row.status_note, status_date=row.status_date)
+
+        pairs = seen_pairs[key]
+        new_sups = [s for s in row.supervisor_names if (s, row.supervisor_dept_name) not in pairs]
+        if not new_sups:
+            dropped += 1
+            continue
+        pairs.update((s, row.supervisor_dept_name) for s in new_sups)
+        out.append(row._replace(supervisor_names=new_sups))
+
+    return out, dropped
+
+
+def row_fingerprint(row: ImportRow) -> str:
+    """بصمة محتوى الصف بعد التنظيف (من غير رقم السطر)."""
+    parts = [
+        row.researcher_name,
+        row.title,
+        row.degree,
+        row.researcher_type,
+        row.status,
+        row.status_note,
+        "|".join(row.supervisor_names),
+        row.supervisor_dept_name,
+    ]
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def split_unchanged(rows: List[ImportRow], batch_size: int = BATCH_SIZE) -> Tuple[List[ImportRow], int]:
+    """
+    يقارن بصمات الصفوف بالـ ledger (ImportRowFingerprint):
+    يرجّع الصفوف الجديدة/المتغيرة + عدد الصفوف اللي متغيرتش.
+    الصف بيتخطى بس لو البحث بتاعه (نفس مفتاح BulkImporter) لسه موجود -
+    لو اتمسح أو اتدمج بعد الاستيراد، نفس الشيت بيرجّعه.
+    """
+    prints = [row_fingerprint(r) for r in rows]
+    known = set()
+    for batch in _chunks(sorted(set(prints)), batch_size):
+        known.update(ImportRowFingerprint.objects.filter(fingerprint__in=batch).values_list("fingerprint", flat=True))
+
+    keys = {i: _research_key(r) for i, (r, fp) in enumerate(zip(rows, prints)) if fp in known}
+    existing = set()
+    for names in _chunks(sorted({key[0] for key in keys.values()}), batch_size):
+        existing.update(
+            Research.objects.filter(researcher_name__in=names).values_list(
+                "researcher_name", "title_hash", "degree", "researcher_type"
+            )
+        )
+
+    changed = [r for i, r in enumerate(rows) if keys.get(i) not in existing]
+    return changed, len(rows) - len(changed)
+
+
+def _research_key(row: ImportRow) -> ResearchKey:
+    # نفس مفتاح BulkImporter.feed
+    return (row.researcher_name, title_to_hash(row.title), row.degree, row.researcher_type)
+
+
+def record_fingerprints(rows: Iterable[ImportRow], batch_size: int = BATCH_SIZE):
+    """يسجّل بصمات الصفوف اللي اتعملها import (نفس transaction الكتابة)."""
+    objs = {}
+    for r in rows:
+        fp = row_fingerprint(r)
+        objs[fp] = ImportRowFingerprint(fingerprint=fp, researcher_name=r.researcher_name)
+    ImportRowFingerprint.objects.bulk_create(list(objs.values()), batch_size=batch_size, ignore_conflicts=True)
+
+
+def file_checksum(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# -----------------------------------
+# قفل الاستيراد (ويب + CLI)
+# -----------------------------------
+IMPORT_LOCK_NAME = "import"
+
+# قفل أقدم من كده = الـ process اللي شايله مات (restart/deploy) -> يتاخد عادي
+IMPORT_LOCK_STALE_AFTER = timedelta(hours=6)
+
+
+class ImportLocked(Exception):
+    def __init__(self, holder: str):
+        super().__init__(f"Another import is running ({holder}). Try again when it finishes.")
+        self.holder = holder
+
+
+def import_lock_holder() -> str:
+    """مين شايل القفل دلوقتي ("" لو محدش)."""
+    lock = ImportLock.objects.filter(name=IMPORT_LOCK_NAME).values_list("holder", "acquired_at").first()
+    if not lock or not lock[0] or lock[1] is None or lock[1] < timezone.now() - IMPORT_LOCK_STALE_AFTER:
+        return ""
+    return lock[0]
+
+
+@contextmanager
+def import_lock(holder: str):
+    """
+    استيراد واحد في نفس الوقت: UPDATE مشروط واحد (atomic في أي DB) بياخد القفل لو فاضي أو قديم،
+    وإلا ImportLocked. القفل بيتساب في الآخر حتى لو الاستيراد فشل.
+    """
+    ImportLock.objects.get_or_create(name=IMPORT_LOCK_NAME)
+    now = timezone.now()
+    taken = (
+        ImportLock.objects.filter(name=IMPORT_LOCK_NAME)
+        .filter(Q(holder="") | Q(acquired_at__isnull=True) | Q(acquired_at__lt=now - IMPORT_LOCK_STALE_AFTER))
+        .update(holder=holder[:255], acquired_at=now)
+    )
+    if not taken:
+        raise ImportLocked(import_lock_holder() or "unknown")
+    try:
+        yield
+    finally:
+        ImportLock.objects.filter(name=IMPORT_LOCK_NAME, holder=holder[:255]).update(holder="", acquired_at=None)
+
+
+def iter_chunks(rows: Iterable, size: int) -> Iterator[list]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunks(items: list, size: int = BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BulkImporter:
+    """
+    محرك استيراد بالجملة:
+    - يحمّل الأقسام/المشرفين/مفاتيح الأبحاث/الروابط مرة واحدة في الذاكرة (load)
+    - يطابق كل صف على الخرائط دي بدون أي query (feed)
+    - يكتب الجديد بـ bulk_create / bulk_update (flush)
+    فعدد الـ queries مش بيكبر مع عدد الصفوف.
+
+    نفس منطق الاستيراد القديم (صف بصف) ونفس العدادات.
+    """
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+
+        self.created_research = 0
+        self.created_supervisors = 0
+        self.created_links = 0
+        self.merged_duplicates = 0
+        self.near_duplicates = 0
+
+        self.departments: Dict[str, Department] = {}
+        self.supervisors: Dict[str, Supervisor] = {}
+        self.researches: Dict[ResearchKey, Research] = {}
+        self.links = set()
+
+        # مكررات قديمة (قبل الـ constraint): key -> [ids] + روابطها
+        self._duplicate_groups: Dict[ResearchKey, List[int]] = {}
+        self._duplicate_links: Dict[int, List[Tuple[int, str]]] = {}
+
+        self._reset_pending()
+
+    def _reset_pending(self):
+        self._new_departments: List[Department] = []
+        self._new_supervisors: List[Supervisor] = []
+        self._new_researches: List[Research] = []
+        self._supervisor_depts: Dict[str, Department] = {}
+        self._status_updates: Dict[int, Research] = {}
+        self._title_updates: Dict[int, Research] = {}
+        self._pending_links: List[Tuple[Research, Supervisor, str, bool]] = []
+        self._duplicates_to_delete: List[int] = []
+
+    # -----------------------------------
+    # تحميل الخرائط
+    # -----------------------------------
+    def load(self):
+        self.departments = {d.name: d for d in Department.objects.only("id", "name")}
+
+        self.supervisors = {}
+        for s in Supervisor.objects.only("id", "name", "department_id").order_by("id"):
+            # لو الاسم مكرر في الداتابيز نثبت على أقدم سجل
+            self.supervisors.setdefault(s.name, s)
+
+        self.researches = {}
+        groups: Dict[ResearchKey, List[int]] = {}
+        qs = Research.objects.only(
+            "id", "researcher_name", "title_hash", "degree", "researcher_type",
+            "status", "status_note", "status_date",
+        ).order_by("id")
+        for r in qs.iterator(chunk_size=2000):
+            key = (r.researcher_name, r.title_hash, r.degree, r.researcher_type)
+            if key in self.researches:
+                groups.setdefault(key, [self.researches[key].pk]).append(r.pk)
+                continue
+            self.researches[key] = r
+        self._duplicate_groups = groups
+
+        duplicate_ids = {rid for ids in groups.values() for rid in ids[1:]}
+        self.links = set()
+        self._duplicate_links = {}
+        for rid, sid, role in ResearchSupervision.objects.values_list("research_id", "supervisor_id", "role").iterator(chunk_size=5000):
+            self.links.add((rid, sid))
+            if rid in duplicate_ids:
+                self._duplicate_links.setdefault(rid, []).append((sid, role))
+
+    # -----------------------------------
+    # مطابقة صف (بدون DB)
+    # -----------------------------------
+    def feed(self, row: ImportRow):
+        title = row.title
+        status, status_note, status_date = row.status, row.status_note, row.status_date
+
+        th = title_to_hash(title)
+        key = (row.researcher_name, th, row.degree, row.researcher_type)
+
+        research = self.researches.get(key)
+
+        # ✅ لو فيه duplicates قديمة هنلمّها ونخلي أقدم واحد أساسي
+        dup_ids = self._duplicate_groups.pop(key, None)
+        if dup_ids:
+            self.merged_duplicates += len(dup_ids) - 1
+            for dup_id in dup_ids[1:]:
+                for sid, role in self._duplicate_links.pop(dup_id, []):
+                    self._pending_links.append((research, Supervisor(pk=sid), role, False))
+                self._duplicates_to_delete.append(dup_id)
+
+        if research is None:
+            research = Research(
+                researcher_name=row.researcher_name,
+                title=title,
+                title_hash=th,        # bulk_create مش بينادي save()
+                degree=row.degree,
+                researcher_type=row.researcher_type,
+                department=None,      # ✅ قسم الباحث فاضي
+                registration_date=None,
+                frame_date=None,
+                university_approval_date=None,
+                status=status,
+                status_note=status_note or "",
+                status_date=status_date,
+            )
+            self.researches[key] = research
+            self._new_researches.append(research)
+            self.created_research += 1
+        elif research.pk is None:
+            # اتعمل في نفس الدفعة ولسه ما اتكتبش -> نعدّل في الذاكرة
+            if status_note and not research.status_note:
+                research.status = status
+                research.status_note = status_note or ""
+                research.status_date = status_date
+        else:
+            # ✅ لو العنوان فاضي عنده وده عندنا عنوان -> حدثه
+            # (title_hash فاضي = العنوان فاضي، علشان ما نحمّلش نص العناوين كلها)
+            if (not research.title_hash) and title:
+                research.title = title
+                self._title_updates[research.pk] = research
+
+            # ✅ تحديث حالة لو عندنا note وهو فاضي
+            if status_note and not research.status_note:
+                research.status = status
+                research.status_note = status_note or ""
+                research.status_date = status_date
+                self._status_updates[research.pk] = research
+
+        # ✅ قسم المشرف (من الشيت)
+        sup_dept = None
+        if row.supervisor_dept_name:
+            sup_dept = self.departments.get(row.supervisor_dept_name)
+            if sup_dept is None:
+                sup_dept = Department(name=row.supervisor_dept_name)
+                self.departments[sup_dept.name] = sup_dept
+                self._new_departments.append(sup_dept)
+
+        for sup_name in row.supervisor_names:
+            supervisor = self.supervisors.get(sup_name)
+            if supervisor is None:
+                supervisor = Supervisor(name=sup_name)
+                self.supervisors[sup_name] = supervisor
+                self._new_supervisors.append(supervisor)
+                self.created_supervisors += 1
+
+            # خزّن قسم المشرف مرة واحدة (أول مرة)
+            if sup_dept and supervisor.department_id is None and sup_name not in self._supervisor_depts:
+                self._supervisor_depts[sup_name] = sup_dept
+
+            self._pending_links.append((research, supervisor, ResearchSupervision.Role.PRIMARY, True))
+
+    def feed_all(self, rows: Iterable[ImportRow], progress=None, every: int = 200):
+        """
+        feed لكل الصفوف، و progress(processed) كل `every` صف (للاستيراد من الويب).
+        """
+        processed = 0
+        for row in rows:
+            self.feed(row)
+            processed += 1
+            if progress and processed % every == 0:
+                progress(processed)
+        if progress:
+            progress(processed)
+        return processed
+
+    # -----------------------------------
+    # الكتابة بالجملة
+    # -----------------------------------
+    def flush(self):
+        bs = self.batch_size
+        changed = bool(
+            self._new_departments or self._supervisor_depts or self._new_supervisors or self._new_researches
+            or self._title_updates or self._status_updates or self._pending_links or self._duplicates_to_delete
+        )
+
+        if self._new_departments:
+            Department.objects.bulk_create(self._new_departments, batch_size=bs)
+            self._assign_pks(
+                self._new_departments,
+                lambda names: Department.objects.filter(name__in=names).values_list("id", "name"),
+                lambda d: d.name,
+                lambda row: row[1],
+            )
+
+        existing_sup_updates = []
+        for sup_name, dept in self._supervisor_depts.items():
+            supervisor = self.supervisors[sup_name]
+            supervisor.department_id = dept.pk
+            if supervisor.pk is not None:
+                existing_sup_updates.append(supervisor)
+
+        if self._new_supervisors:
+            Supervisor.objects.bulk_create(self._new_supervisors, batch_size=bs)
+            self._assign_pks(
+                self._new_supervisors,
+                lambda names: Supervisor.objects.filter(name__in=names).order_by("id").values_list("id", "name"),
+                lambda s: s.name,
+                lambda row: row[1],
+            )
+        if existing_sup_updates:
+            Supervisor.objects.bulk_update(existing_sup_updates, ["department"], batch_size=bs)
+
+        if self._new_researches:
+            Research.objects.bulk_create(self._new_researches, batch_size=bs)
+            self._assign_pks(
+                self._new_researches,
+                lambda names: Research.objects.filter(researcher_name__in=names).values_list(
+                    "id", "researcher_name", "title_hash", "degree", "researcher_type"
+                ),
+                lambda r: r.researcher_name,
+                lambda row: row[1:],
+                obj_key=lambda r: (r.researcher_name, r.title_hash, r.degree, r.researcher_type),
+            )
+
+        now = timezone.now()
+        if self._title_updates:
+            objs = list(self._title_updates.values())
+            for r in objs:
+                r.updated_at = now
+            Research.objects.bulk_update(objs, ["title", "title_hash", "updated_at"], batch_size=bs)
+        if self._status_updates:
+            objs = list(self._status_updates.values())
+            for r in objs:
+                r.updated_at = now
+            Research.objects.bulk_update(objs, ["status", "status_note", "status_date", "updated_at"], batch_size=bs)
+
+        # ✅ الروابط بنفس ترتيب الصفوف (علشان العداد يطلع زي القديم)
+        new_links = []
+        for research, supervisor, role, counted in self._pending_links:
+            pair = (research.pk, supervisor.pk)
+            if pair in self.links:
+                continue
+            self.links.add(pair)
+            new_links.append(ResearchSupervision(research_id=pair[0], supervisor_id=pair[1], role=role))
+            if counted:
+                self.created_links += 1
+        if new_links:
+            ResearchSupervision.objects.bulk_create(new_links, batch_size=bs)
+
+        for ids in _chunks(self._duplicates_to_delete, bs):
+            Research.objects.filter(id__in=ids).delete()
+
+        # ✅ bulk_create/bulk_update مش بيبعتوا signals -> الإصدار وعدادات المشرفين بيتحدثوا هنا مرة واحدة
+        if changed:
+            bump_data_version()
+        touched = {link.supervisor_id for link in new_links}
+        if self._status_updates:
+            touched.update(
+                ResearchSupervision.objects.filter(research_id__in=list(self._status_updates))
+                .values_list("supervisor_id", flat=True)
+            )
+        if touched:
+            refresh_supervisor_loads(touched)
+        if new_links:
+            refresh_research_scopes({link.research_id for link in new_links})
+        if existing_sup_updates:
+            refresh_supervisor_research_scopes([s.pk for s in existing_sup_updates])
+        if self._new_researches or self._title_updates:
+            index_researches([r.pk for r in self._new_researches] + list(self._title_updates))
+            # ✅ شبه المكرر بيتسجل للمراجعة (بالمفاتيح بتاعة الأبحاث دي بس، من غير scan للجدول)
+            self.near_duplicates += flag_near_duplicates(
+                [r.pk for r in self._new_researches] + list(self._title_updates)
+            )
+        if self._new_supervisors:
+            index_supervisors([sup.pk for sup in self._new_supervisors])
+
+        self._reset_pending()
+
+    def _assign_pks(self, objs, fetch, lookup_value, row_key, obj_key=None):
+        """
+        MySQL مش بيرجع الـ ids بعد bulk_create -> نجيبها بالمفتاح الطبيعي.
+        """
+        if all(o.pk is not None for o in objs):
+            return
+        obj_key = obj_key or lookup_value
+        wanted = {obj_key(o): o for o in objs if o.pk is None}
+        values = sorted({lookup_value(o) for o in wanted.values()})
+        for batch in _chunks(values, self.batch_size):
+            for row in fetch(batch):
+                obj = wanted.get(row_key(row))
+                if obj is not None and obj.pk is None:
+                    obj.pk = row[0]
+                    obj._state.adding = False
+
+    COUNTERS = ("created_research", "created_supervisors", "created_links", "merged_duplicates")
+
+    def counters(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+    def restore_counters(self, values: Dict[str, int]):
+        for name in self.COUNTERS:
+            setattr(self, name, values.get(name, 0))
+
+    def summary(self) -> str:
+        return (
+            "Done. "
+            f"Research created: {self.created_research} | Supervisors created: {self.created_supervisors} | "
+            f"Links created: {self.created_links} | Duplicates merged: {self.merged_duplicates} | "
+            f"Near-duplicate titles flagged: {self.near_duplicates}"
+        )
@@ -0,0 +1,85 @@
+# =========================================
+# file: core/management/commands/backfill_title_hash.py
+# =========================================
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Research, compute_title_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Research.title_hash with the shared title canonicalization, in id-ordered chunks "
+        "(one transaction per chunk). Safe to stop and re-run; --after_id resumes from the last printed id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk_size", default=1000, type=int, help="Rows per transaction")
+        parser.add_argument("--after_id", default=0, type=int, help="Resume after this Research id")
+
+    def handle(self, *args, **opts):
+        chunk_size = max(1, opts["chunk_size"])
+        last_id = opts["after_id"]
+        scanned = updated = 0
+        conflicts = []
+
+        while True:
+            # ✅ keyset بالـ id: الجدول مش بيتحمل في الذاكرة، وكل دفعة commit لوحدها
+            chunk = list(
+                Research.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "researcher_name", "title", "title_hash", "degree", "researcher_type")[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            changed = []
+            for rid, name, title, old_hash, degree, rtype in chunk:
+                new_hash = compute_title_hash(title)
+                if new_hash != old_hash:
+                    changed.append((rid, (name, new_hash, degree, rtype)))
+
+            if changed:
+                updated_now, skipped = self._apply(changed)
+                updated += updated_now
+                conflicts.extend(skipped)
+
+            scanned += len(chunk)
+            last_id = chunk[-1][0]
+            self.stdout.write(f"... scanned: {scanned} | updated: {updated} | last id: {last_id}")
+
+        for rid, other_id in conflicts:
+            self.stdout.write(self.style.WARNING(f"Research #{rid} duplicates #{other_id} after rehash (kept old hash)"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Research scanned: {scanned} | Hashes updated: {updated} | Conflicts: {len(conflicts)}"
+        ))
+        if conflicts:
+            self.stdout.write("Fix or merge the conflicting rows by hand, then re-run.")
+
+    @transaction.atomic
+    def _apply(self, changed):
+        """
+        بيكتب الـ hashes الجديدة بالجملة، ويسيب أي صف الـ hash الجديد بتاعه هيكرر مفتاح الـ unique
+        (الاسم، title_hash، المرحلة، النوع) لبحث تاني - بيرجّع (عدد المتحدث، [(id, id التاني)]).
+        """
+        ids = {rid for rid, _ in changed}
+        taken = {}
+        for other_id, *key in (
+            Research.objects.filter(title_hash__in={key[1] for _, key in changed})
+            .exclude(id__in=ids)
+            .values_list("id", "researcher_name", "title_hash", "degree", "researcher_type")
+        ):
+            taken[tuple(key)] = other_id
+
+        objs, conflicts = [], []
+        for rid, key in changed:
+            if key in taken:
+                conflicts.append((rid, taken[key]))
+                continue
+            taken[key] = rid
+            objs.append(Research(id=rid, title_hash=key[1]))
+
+        # title_hash بس (من غير title) -> bulk_update العادي من غير إعادة حساب
+        Research.objects.bulk_update(objs, ["title_hash"], batch_size=500)
+        return len(objs), conflicts
@@ -1,54 +1,29 @@
 # =========================================
 # file: core/management/commands/dedupe_researches.py
 # =========================================
-from collections import defaultdict
-
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
-from core.models import Research, ResearchSupervision
+from core.research_dedupe import CHUNK_SIZE, dedupe_researches
 
 
 class Command(BaseCommand):
-    help = "Merge duplicate Research rows (same researcher_name + title + degree + researcher_type)."
-
-    @transaction.atomic
-    def handle(self, *args, **options):
-        groups = defaultdict(list)
-        for r in Research.objects.all().order_by("id"):
-            key = (r.researcher_name.strip(), (r.title or "").strip(), r.degree, r.researcher_type)
-            groups[key].append(r)
-
-        merged = 0
-        deleted = 0
-        moved_links = 0
-
-        for _, items in groups.items():
-            if len(items) <= 1:
-                continue
-
-            keep = items[0]
-            # prefer record with researcher dept (if any)
-            for cand in items:
-                if cand.department_id is not None:
-                    keep = cand
-                    break
+    help = (
+        "Merge duplicate Research rows (same stripped researcher_name + canonical title + degree + researcher_type). "
+        "Groups are found in SQL and merged in chunks, one transaction per chunk."
+    )
 
-            for dup in [x for x in items if x.id != keep.id]:
-                for link in ResearchSupervision.objects.filter(research=dup).select_related("supervisor"):
-                    obj, created = ResearchSupervision.objects.get_or_create(
-                        research=keep,
-                        supervisor=link.supervisor,
-                        defaults={"role": link.role},
-                    )
-                    if created:
-                        moved_links += 1
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk_size", default=CHUNK_SIZE, type=int, help="Duplicate groups per transaction")
+        parser.add_argument("--dry_run", action="store_true", help="Only count the duplicate groups")
 
-                dup.delete()
-                deleted += 1
+    def handle(self, *args, **opts):
+        def progress(totals):
+            self.stdout.write(f"... groups: {totals['groups']} | duplicates: {totals['deleted']}")
 
-            merged += 1
+        result = dedupe_researches(chunk_size=opts["chunk_size"], dry_run=opts["dry_run"], progress=progress)
 
+        prefix = "Dry run. " if opts["dry_run"] else "Done. "
         self.stdout.write(self.style.SUCCESS(
-            f"Done. Groups merged: {merged} | Duplicates deleted: {deleted} | Links moved: {moved_links}"
-        ))
\ No newline at end of file
+            f"{prefix}Groups merged: {result['groups']} | Duplicates deleted: {result['deleted']} | "
+            f"Links moved: {result['links_moved']} | Fee payments moved: {result['fees_moved']}"
+        ))
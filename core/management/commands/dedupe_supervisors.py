@@ -1,63 +1,72 @@
 # =========================================
 # file: core/management/commands/dedupe_supervisors.py
 # =========================================
-import re
-from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from core.supervisor_dedupe import (
+    DEFAULT_THRESHOLD,
+    DEFAULT_WINDOW,
+    apply_merges,
+    find_duplicate_groups,
+    plan_to_json,
+    read_approved,
+    write_plan,
+)
 
-from core.models import Supervisor, ResearchSupervision
 
+class Command(BaseCommand):
+    help = (
+        "Find duplicate supervisors (Arabic-normalized names, titles stripped) and merge them. "
+        "Without options prints the merge plan; --plan writes it as JSON for review; "
+        "--apply merges the approved groups of a reviewed plan; --auto merges exact normalized matches."
+    )
 
-def norm(name: str) -> str:
-    name = (name or "").strip()
-    name = re.sub(r"\s+", " ", name)
-    return name
+    def add_arguments(self, parser):
+        parser.add_argument("--plan", help="Write the merge plan (JSON) to this path")
+        parser.add_argument("--apply", help="Apply the approved groups of this plan (JSON)")
+        parser.add_argument("--auto", action="store_true", help="Merge groups whose names match exactly after normalization")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+        parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
 
+    def handle(self, *args, **options):
+        if options["apply"]:
+            try:
+                merges = read_approved(options["apply"])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                raise CommandError(f"Invalid plan file: {e}")
+            self._apply(merges)
+            return
 
-class Command(BaseCommand):
-    help = "Merge duplicate supervisors by normalized name."
+        if not 0 < options["threshold"] <= 1:
+            raise CommandError("--threshold must be in (0, 1]")
 
-    @transaction.atomic
-    def handle(self, *args, **options):
-        groups = defaultdict(list)
-        for s in Supervisor.objects.all().order_by("id"):
-            groups[norm(s.name)].append(s)
-
-        merged = 0
-        deleted = 0
-        moved_links = 0
-
-        for _, items in groups.items():
-            if len(items) <= 1:
-                continue
-
-            keep = items[0]
-            for cand in items:
-                if cand.department_id is not None:
-                    keep = cand
-                    break
-
-            for dup in [x for x in items if x.id != keep.id]:
-                for link in ResearchSupervision.objects.filter(supervisor=dup).select_related("research"):
-                    obj, created = ResearchSupervision.objects.get_or_create(
-                        research=link.research,
-                        supervisor=keep,
-                        defaults={"role": link.role},
-                    )
-                    if created:
-                        moved_links += 1
-
-                if keep.department_id is None and dup.department_id is not None:
-                    keep.department_id = dup.department_id
-                    keep.save(update_fields=["department"])
-
-                dup.delete()
-                deleted += 1
-
-            merged += 1
+        groups = find_duplicate_groups(threshold=options["threshold"], window=options["window"])
+        plan = plan_to_json(groups)
+
+        if options["plan"]:
+            write_plan(groups, options["plan"])
+            self.stdout.write(f"Plan written to {options['plan']}")
+        elif not options["auto"]:
+            for g in plan:
+                mark = "auto" if g["approved"] else "review"
+                self.stdout.write(f"[{mark}] keep #{g['keep']['id']} {g['keep']['name']} ({g['keep']['links']} links)")
+                for m in g["merge"]:
+                    self.stdout.write(f"    <- #{m['id']} {m['name']} ({m['links']} links, score {m['score']})")
+
+        approved = sum(1 for g in plan if g["approved"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Groups found: {len(plan)} | Exact (auto-approved): {approved} | Need review: {len(plan) - approved}"
+        ))
+
+        if options["auto"]:
+            self._apply([
+                (g["keep"]["id"], [m["id"] for m in g["merge"]])
+                for g in plan if g["approved"]
+            ])
 
+    def _apply(self, merges):
+        result = apply_merges(merges)
         self.stdout.write(self.style.SUCCESS(
-            f"Done. Groups merged: {merged} | Duplicates deleted: {deleted} | Links moved: {moved_links}"
-        ))
\ No newline at end of file
+            f"Done. Groups merged: {result['groups']} | Duplicates deleted: {result['deleted']} | "
+            f"Links moved: {result['links_moved']} | Duplicate links dropped: {result['links_dropped']}"
+        ))
@@ -0,0 +1,33 @@
+# =========================================
+# file: core/management/commands/export_pack.py
+# =========================================
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.export_pack import build_cached_pack, build_pack
+from core.supervisor_load import bucket_for
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a zip with one workbook per department and one per supervisor. "
+        "Without an output path the zip is built into the export cache the web page serves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", nargs="?", type=str, help="Path of the zip file to write (default: export cache)")
+        parser.add_argument("--sf", default="active", type=str, help="Status filter: active/discussed/active_discussed/dismissed/all")
+        parser.add_argument("--workers", default=os.cpu_count() or 1, type=int, help="Parallel workbook builder processes")
+
+    def handle(self, *args, **opts):
+        sf = bucket_for(opts["sf"])
+
+        if not opts["output"]:
+            path = build_cached_pack(sf=sf, workers=opts["workers"])
+            self.stdout.write(self.style.SUCCESS(f"Done. Cached: {path}"))
+            return
+
+        with open(opts["output"], "wb") as f:
+            count = build_pack(f, sf=sf, workers=opts["workers"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Workbooks: {count} | Output: {opts['output']}"))
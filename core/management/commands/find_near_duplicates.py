@@ -0,0 +1,42 @@
+# =========================================
+# file: core/management/commands/find_near_duplicates.py
+# =========================================
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Research
+from core.near_duplicates import (
+    DEFAULT_THRESHOLD,
+    INDEX_CHUNK_SIZE,
+    find_near_duplicates,
+    index_title_bands,
+    record_near_duplicates,
+)
+
+
+class Command(BaseCommand):
+    help = "Flag Research rows whose titles are near-duplicates (MinHash/LSH on normalized Arabic title shingles)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Rebuild the title LSH keys first (chunked)")
+        parser.add_argument("--chunk_size", default=INDEX_CHUNK_SIZE, type=int, help="Rows per transaction for --rebuild")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Minimum title Jaccard similarity")
+        parser.add_argument("--show", action="store_true", help="Print the pairs found")
+
+    def handle(self, *args, **opts):
+        if not 0 < opts["threshold"] <= 1:
+            raise CommandError("--threshold must be in (0, 1]")
+
+        if opts["rebuild"]:
+            indexed = index_title_bands(chunk_size=opts["chunk_size"])
+            self.stdout.write(f"Research indexed: {indexed}")
+
+        found = find_near_duplicates(threshold=opts["threshold"])
+        record_near_duplicates(found)
+
+        if opts["show"]:
+            ids = {rid for a, b, _ in found for rid in (a, b)}
+            titles = dict(Research.objects.filter(id__in=ids).values_list("id", "title"))
+            for a, b, score in found:
+                self.stdout.write(f"{score:.3f}  #{a} {titles.get(a, '')}\n       #{b} {titles.get(b, '')}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. Near-duplicate pairs: {len(found)}"))
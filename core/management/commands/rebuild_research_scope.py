@@ -0,0 +1,14 @@
+# =========================================
+# file: core/management/commands/rebuild_research_scope.py
+# =========================================
+from django.core.management.base import BaseCommand
+
+from core.research_scope import refresh_research_scopes
+
+
+class Command(BaseCommand):
+    help = "Rebuild ResearchDepartmentScope (research -> department of its active supervisors)."
+
+    def handle(self, *args, **options):
+        count = refresh_research_scopes()
+        self.stdout.write(self.style.SUCCESS(f"Done. Scope rows: {count}"))
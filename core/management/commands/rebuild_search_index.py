@@ -0,0 +1,18 @@
+# =========================================
+# file: core/management/commands/rebuild_search_index.py
+# =========================================
+from django.core.management.base import BaseCommand
+
+from core.search import INDEX_CHUNK_SIZE, index_researches, index_supervisors
+
+
+class Command(BaseCommand):
+    help = "Rebuild the normalized search terms for every Research and Supervisor (chunked)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk_size", default=INDEX_CHUNK_SIZE, type=int, help="Rows per transaction")
+
+    def handle(self, *args, **opts):
+        researches = index_researches(chunk_size=opts["chunk_size"])
+        supervisors = index_supervisors(chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Done. Research indexed: {researches} | Supervisors indexed: {supervisors}"))
@@ -0,0 +1,14 @@
+# =========================================
+# file: core/management/commands/rebuild_supervisor_load.py
+# =========================================
+from django.core.management.base import BaseCommand
+
+from core.supervisor_load import refresh_supervisor_loads
+
+
+class Command(BaseCommand):
+    help = "Rebuild SupervisorLoad counters for every supervisor (all status buckets)."
+
+    def handle(self, *args, **options):
+        count = refresh_supervisor_loads()
+        self.stdout.write(self.style.SUCCESS(f"Done. Supervisors with load rows: {count}"))
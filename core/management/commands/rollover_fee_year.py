@@ -0,0 +1,23 @@
+# =========================================
+# file: core/management/commands/rollover_fee_year.py
+# =========================================
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.fees import active_researchers, provision_fee_year
+
+
+class Command(BaseCommand):
+    help = "Create the (unpaid) fee rows of a year for every active researcher in bulk, ignoring existing rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, default=None, help="Default: the current year")
+
+    def handle(self, *args, **opts):
+        year = opts["year"] or timezone.localdate().year
+        created = provision_fee_year(year)
+        # ✅ created = الصفوف اللي اتعملت فعلاً، والباقي كان موجود قبل كده (أو اتعمل في نفس الوقت)
+        existing = active_researchers().filter(fee_payments__year=year).count() - created
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Year: {year} | Fee rows created: {created} | Already existed: {existing}"
+        ))
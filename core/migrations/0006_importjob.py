@@ -0,0 +1,42 @@
+# Generated by Django 5.2.10 on 2026-10-17 02:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_departmentuser'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/%Y/%m/', verbose_name='الملف')),
+                ('original_name', models.CharField(blank=True, max_length=255)),
+                ('sheet', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'في الانتظار'), ('RUNNING', 'جاري الاستيراد'), ('DONE', 'تم'), ('FAILED', 'فشل')], db_index=True, default='PENDING', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('rows_total', models.PositiveIntegerField(default=0)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('rows_rejected', models.PositiveIntegerField(default=0)),
+                ('created_research', models.PositiveIntegerField(default=0)),
+                ('created_supervisors', models.PositiveIntegerField(default=0)),
+                ('created_links', models.PositiveIntegerField(default=0)),
+                ('merged_duplicates', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-17 02:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(max_length=64)),
+                ('sheet', models.CharField(blank=True, max_length=255)),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('last_line', models.PositiveIntegerField(default=0)),
+                ('rows_committed', models.PositiveIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('created_research', models.PositiveIntegerField(default=0)),
+                ('created_supervisors', models.PositiveIntegerField(default=0)),
+                ('created_links', models.PositiveIntegerField(default=0)),
+                ('merged_duplicates', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('checksum', 'sheet'), name='uniq_import_checkpoint_file_sheet')],
+            },
+        ),
+    ]
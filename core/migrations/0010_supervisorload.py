@@ -0,0 +1,65 @@
+# Generated by Django 5.2.10 on 2026-10-17 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_loads(apps, schema_editor):
+    # ✅ عدادات المشرفين الموجودين (نفس core.supervisor_load بقيم ثابتة، من غير الموديلات الحالية)
+    ResearchSupervision = apps.get_model("core", "ResearchSupervision")
+    SupervisorLoad = apps.get_model("core", "SupervisorLoad")
+
+    buckets = {
+        "active": ~Q(research__status__in=["DISCUSSED", "DISMISSED", "CANCELLED"]),
+        "discussed": Q(research__status="DISCUSSED"),
+        "active_discussed": ~Q(research__status__in=["DISMISSED", "CANCELLED"]),
+        "dismissed": Q(research__status="DISMISSED"),
+        "all": Q(),
+    }
+    researcher = Q(research__researcher_type="RESEARCHER")
+    assistant = Q(research__researcher_type="ASSISTANT")
+    aggregates = {}
+    for bucket, status_q in buckets.items():
+        aggregates[f"{bucket}_ma_count"] = Count("id", filter=researcher & Q(research__degree="MA") & status_q)
+        aggregates[f"{bucket}_phd_count"] = Count("id", filter=researcher & Q(research__degree="PHD") & status_q)
+        aggregates[f"{bucket}_researchers_total"] = Count("id", filter=researcher & status_q)
+        aggregates[f"{bucket}_assistants_count"] = Count("id", filter=assistant & status_q)
+
+    counters = ("ma_count", "phd_count", "researchers_total", "assistants_count")
+    objs = []
+    for row in ResearchSupervision.objects.values("supervisor_id").annotate(**aggregates).order_by():
+        for bucket in buckets:
+            objs.append(SupervisorLoad(
+                supervisor_id=row["supervisor_id"],
+                bucket=bucket,
+                **{name: row[f"{bucket}_{name}"] for name in counters},
+            ))
+    SupervisorLoad.objects.bulk_create(objs, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupervisorLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('active', 'الحاليين'), ('discussed', 'ناقشوا'), ('active_discussed', 'الحاليين+ناقشوا'), ('dismissed', 'مفصولين'), ('all', 'الكل')], max_length=20)),
+                ('ma_count', models.PositiveIntegerField(default=0)),
+                ('phd_count', models.PositiveIntegerField(default=0)),
+                ('researchers_total', models.PositiveIntegerField(default=0)),
+                ('assistants_count', models.PositiveIntegerField(default=0)),
+                ('supervisor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loads', to='core.supervisor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'researchers_total'], name='core_superv_bucket_0a1e43_idx')],
+                'constraints': [models.UniqueConstraint(fields=('supervisor', 'bucket'), name='uniq_supervisor_load_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_loads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.10 on 2026-10-17 02:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_scopes(apps, schema_editor):
+    # ✅ نطاق الأبحاث الموجودة (نفس قاعدة core.research_scope)
+    ResearchSupervision = apps.get_model("core", "ResearchSupervision")
+    ResearchDepartmentScope = apps.get_model("core", "ResearchDepartmentScope")
+    pairs = (
+        ResearchSupervision.objects.filter(supervisor__is_active=True, supervisor__department__isnull=False)
+        .values_list("research_id", "supervisor__department_id")
+        .distinct()
+    )
+    ResearchDepartmentScope.objects.bulk_create(
+        [ResearchDepartmentScope(research_id=r, department_id=d) for r, d in pairs],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_supervisorload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResearchDepartmentScope',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='research_scopes', to='core.department')),
+                ('research', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='department_scopes', to='core.research')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['research', 'department'], name='core_resear_researc_7a2197_idx')],
+                'constraints': [models.UniqueConstraint(fields=('department', 'research'), name='uniq_research_department_scope')],
+            },
+        ),
+        migrations.RunPython(fill_scopes, migrations.RunPython.noop),
+    ]
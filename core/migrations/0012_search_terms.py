@@ -0,0 +1,95 @@
+# Generated by Django 5.2.10 on 2026-10-17 02:42
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# ✅ نسخة ثابتة من core.arabic وقت الـ migration دي (تعديل core.arabic بعد كده مايغيرش الـ migration)
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_NON_WORD = re.compile(r"[^\w]+|_")
+_LETTERS = str.maketrans({
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    "ؤ": "و",
+    "ئ": "ي",
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+})
+_PROCLITICS = ("وبال", "وال", "بال", "كال", "فال", "لل", "ال", "و", "ب", "ل", "ف", "ك")
+
+
+def index_terms(text, min_stem=3, max_length=100):
+    if not text:
+        return []
+    text = _DIACRITICS.sub("", str(text)).translate(_LETTERS).lower()
+    seen = {}
+    for token in _NON_WORD.sub(" ", text).split():
+        token = token[:max_length]
+        seen.setdefault(token, None)
+        for prefix in _PROCLITICS:
+            if token.startswith(prefix) and len(token) - len(prefix) >= min_stem:
+                seen.setdefault(token[len(prefix):], None)
+    return list(seen)
+
+
+def fill_terms(apps, schema_editor):
+    # ✅ كلمات البحث للداتا الموجودة (نفس core.search بالنسخة الثابتة فوق، من غير الموديلات الحالية)
+    Research = apps.get_model("core", "Research")
+    Supervisor = apps.get_model("core", "Supervisor")
+    ResearchSearchTerm = apps.get_model("core", "ResearchSearchTerm")
+    SupervisorSearchTerm = apps.get_model("core", "SupervisorSearchTerm")
+
+    objs = []
+    for rid, name, title in Research.objects.values_list("id", "researcher_name", "title").iterator():
+        objs.extend(ResearchSearchTerm(research_id=rid, term=t) for t in index_terms(f"{name or ''} {title or ''}"))
+        if len(objs) >= 5000:
+            ResearchSearchTerm.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+            objs = []
+    ResearchSearchTerm.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+
+    SupervisorSearchTerm.objects.bulk_create(
+        [SupervisorSearchTerm(supervisor_id=sid, term=t) for sid, name in Supervisor.objects.values_list("id", "name") for t in index_terms(name)],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_researchdepartmentscope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResearchSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('research', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='core.research')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'research'], name='core_resear_term_d996cd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('research', 'term'), name='uniq_research_search_term')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SupervisorSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('supervisor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='core.supervisor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'supervisor'], name='core_superv_term_4aa33e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('supervisor', 'term'), name='uniq_supervisor_search_term')],
+            },
+        ),
+        migrations.RunPython(fill_terms, migrations.RunPython.noop),
+    ]
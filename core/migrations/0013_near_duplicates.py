@@ -0,0 +1,108 @@
+# Generated by Django 5.2.10 on 2026-10-17 02:45
+
+import hashlib
+import random
+import re
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# ✅ نسخة ثابتة من core.arabic.normalize_arabic + core.near_duplicates.title_band_keys وقت الـ migration دي
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_NON_WORD = re.compile(r"[^\w]+|_")
+_LETTERS = str.maketrans({
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    "ؤ": "و",
+    "ئ": "ي",
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+})
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def title_band_keys(title):
+    if not title:
+        return []
+    text = _DIACRITICS.sub("", str(title)).translate(_LETTERS).lower()
+    text = " ".join(_NON_WORD.sub(" ", text).split())
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text} if text else set()
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = [_hash64(s) % _PRIME for s in shingles]
+    if not hashes:
+        return []
+    signature = [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+    keys = []
+    for band in range(BANDS):
+        raw = f"{band}:" + ",".join(map(str, signature[band * ROWS:(band + 1) * ROWS]))
+        keys.append(int.from_bytes(hashlib.blake2b(raw.encode(), digest_size=8).digest(), "big", signed=True))
+    return keys
+
+
+def fill_bands(apps, schema_editor):
+    # ✅ مفاتيح LSH للعناوين الموجودة (نفس core.near_duplicates بالنسخة الثابتة فوق، من غير الموديلات الحالية)
+    Research = apps.get_model("core", "Research")
+    ResearchTitleBand = apps.get_model("core", "ResearchTitleBand")
+
+    objs = []
+    for rid, title in Research.objects.values_list("id", "title").iterator():
+        objs.extend(ResearchTitleBand(research_id=rid, band_key=k) for k in title_band_keys(title))
+        if len(objs) >= 5000:
+            ResearchTitleBand.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+            objs = []
+    ResearchTitleBand.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_search_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResearchNearDuplicate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.research')),
+                ('research', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='near_duplicates', to='core.research')),
+            ],
+            options={
+                'ordering': ['-score', 'research_id'],
+                'constraints': [models.UniqueConstraint(fields=('research', 'other'), name='uniq_research_near_duplicate')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResearchTitleBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band_key', models.BigIntegerField()),
+                ('research', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='title_bands', to='core.research')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band_key', 'research'], name='core_resear_band_ke_df4b5a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('research', 'band_key'), name='uniq_research_title_band')],
+            },
+        ),
+        migrations.RunPython(fill_bands, migrations.RunPython.noop),
+    ]
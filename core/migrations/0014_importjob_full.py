@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='full',
+            field=models.BooleanField(default=False, verbose_name='استيراد كامل'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+def drop_old_lock_row(apps, schema_editor):
+    # ✅ القفل القديم كان صف في DataVersion (key=import_lock) - مكانه دلوقتي ImportLock
+    apps.get_model("core", "DataVersion").objects.filter(key="import_lock").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_importjob_full'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('holder', models.CharField(blank=True, max_length=255)),
+                ('acquired_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(drop_old_lock_row, migrations.RunPython.noop),
+    ]
@@ -2,11 +2,25 @@
 # file: core/models.py
 # =========================================
 import hashlib
+import re
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 
+def canonical_title(title) -> str:
+    """
+    ✅ الشكل الوحيد للعنوان اللي title_hash بيتحسب منه (الموديل + الاستيراد + الدمج + الـ backfill):
+    من غير مسافات في الأول/الآخر، وأي مسافات/أسطر جوه = مسافة واحدة.
+    """
+    return re.sub(r"\s+", " ", str(title or "")).strip()
+
+
+def compute_title_hash(title) -> str:
+    t = canonical_title(title)
+    return hashlib.sha256(t.encode("utf-8")).hexdigest() if t else ""
+
+
 class Department(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
@@ -32,6 +46,35 @@ class Supervisor(models.Model):
         return self.name
 
 
+class ResearchQuerySet(models.QuerySet):
+    """
+    ✅ bulk_create / bulk_update / update مش بينادوا save() -> title_hash بيتحسب هنا كمان
+    (update بـ expression للعنوان لازم يبعت title_hash بنفسه)
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.title_hash = compute_title_hash(obj.title)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if "title" in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.title_hash = compute_title_hash(obj.title)
+            if "title_hash" not in fields:
+                fields.append("title_hash")
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        title = kwargs.get("title")
+        if "title" in kwargs and "title_hash" not in kwargs and (title is None or isinstance(title, str)):
+            kwargs["title_hash"] = compute_title_hash(title)
+        return super().update(**kwargs)
+
+
 class Research(models.Model):
     class Degree(models.TextChoices):
         MA = "MA", "ماجستير"
@@ -106,9 +149,13 @@ class Research(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ResearchQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
-        t = (self.title or "").strip()
-        self.title_hash = hashlib.sha256(t.encode("utf-8")).hexdigest() if t else ""
+        self.title_hash = compute_title_hash(self.title)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "title" in update_fields and "title_hash" not in update_fields:
+            kwargs["update_fields"] = list(update_fields) + ["title_hash"]
         super().save(*args, **kwargs)
 
     # =========================
@@ -148,7 +195,11 @@ class Research(models.Model):
     def fees_paid_at(self):
         """تاريخ دفع مصروفات السنة الحالية (بديل fees_paid_at القديم)."""
         year = timezone.localdate().year
-        p = self.fee_payments.filter(year=int(year)).first()
+        pref = self._prefetched_fee_payments()
+        if pref is not None:
+            p = next((x for x in pref if x.year == year), None)
+        else:
+            p = self.fee_payments.filter(year=int(year)).first()
         return p.paid_at if (p and p.is_paid) else None
 
     class Meta:
@@ -234,3 +285,252 @@ class DepartmentUser(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.department.name}"
+
+
+class ImportJob(models.Model):
+    """
+    ✅ استيراد Excel من صفحة الرفع (بيشتغل في الخلفية)
+    - الملف بيتخزن محليًا والـ worker thread بيحدّث التقدم هنا
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "في الانتظار"
+        RUNNING = "RUNNING", "جاري الاستيراد"
+        DONE = "DONE", "تم"
+        FAILED = "FAILED", "فشل"
+
+    file = models.FileField("الملف", upload_to="imports/%Y/%m/")
+    original_name = models.CharField(max_length=255, blank=True)
+    sheet = models.CharField(max_length=255, blank=True)
+    # ✅ استيراد كامل: من غير تخطي الصفوف اللي بصمتها في الـ ledger (زي --full)
+    full = models.BooleanField("استيراد كامل", default=False)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="import_jobs")
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
+    error = models.TextField(blank=True)
+
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_rejected = models.PositiveIntegerField(default=0)
+    rows_unchanged = models.PositiveIntegerField(default=0)
+    created_research = models.PositiveIntegerField(default=0)
+    created_supervisors = models.PositiveIntegerField(default=0)
+    created_links = models.PositiveIntegerField(default=0)
+    merged_duplicates = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.original_name or self.file.name} ({self.status})"
+
+
+class ImportLock(models.Model):
+    """
+    ✅ قفل الاستيراد: استيراد واحد بس (من الويب أو import_supervisions) في نفس الوقت
+    - صف واحد لكل name، بيتاخد بـ UPDATE مشروط (holder فاضي أو قديم) -> مفيش transaction مفتوحة طول الاستيراد
+    - holder = مين شايله (job / أمر CLI) علشان رسالة الرفض
+    """
+    name = models.CharField(max_length=50, unique=True)
+    holder = models.CharField(max_length=255, blank=True)
+    acquired_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.holder or '-'}"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    ✅ نقطة استكمال للاستيراد المقسّم (--chunk_size / --resume)
+    - لكل (بصمة الملف + الشيت) سجل واحد
+    - last_line = رقم آخر سطر Excel اتعمله commit
+    """
+    checksum = models.CharField(max_length=64)
+    sheet = models.CharField(max_length=255, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+
+    last_line = models.PositiveIntegerField(default=0)
+    rows_committed = models.PositiveIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    created_research = models.PositiveIntegerField(default=0)
+    created_supervisors = models.PositiveIntegerField(default=0)
+    created_links = models.PositiveIntegerField(default=0)
+    merged_duplicates = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["checksum", "sheet"], name="uniq_import_checkpoint_file_sheet"),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name or self.checksum[:12]} @ {self.last_line}"
+
+
+class ImportRowFingerprint(models.Model):
+    """
+    ✅ بصمة كل صف اتعمله import (الاسم/العنوان/المرحلة/النوع/الحالة/المشرفين/القسم بعد التنظيف)
+    - الاستيراد التالي بيتخطى أي صف بصمته موجودة (متغيرش)
+    """
+    fingerprint = models.CharField(max_length=64, unique=True)
+    researcher_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.researcher_name} ({self.fingerprint[:12]})"
+
+
+class DataVersion(models.Model):
+    """
+    ✅ رقم إصدار الداتا (الأبحاث/المشرفين/الروابط/الأقسام)
+    - بيزيد مع أي حفظ/حذف (signals) أو كتابة بالجملة (الاستيراد)
+    - الكاش (التصدير مثلاً) بيتربط بيه: إصدار جديد = كاش جديد
+    """
+    key = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+class SupervisorLoad(models.Model):
+    """
+    ✅ عدادات حمل المشرف جاهزة (denormalized) لكل فلتر حالة (sf)
+    - بتتحدث مع أي حفظ/حذف لبحث أو رابط (signals) ومع الاستيراد
+    - صفحة المشرفين / شيت Supervisors Summary بيقروا منها بدل GROUP BY على الروابط
+    - إعادة بناء كاملة: python manage.py rebuild_supervisor_load
+    """
+    class Bucket(models.TextChoices):
+        ACTIVE = "active", "الحاليين"
+        DISCUSSED = "discussed", "ناقشوا"
+        ACTIVE_DISCUSSED = "active_discussed", "الحاليين+ناقشوا"
+        DISMISSED = "dismissed", "مفصولين"
+        ALL = "all", "الكل"
+
+    supervisor = models.ForeignKey(Supervisor, on_delete=models.CASCADE, related_name="loads")
+    bucket = models.CharField(max_length=20, choices=Bucket.choices)
+
+    ma_count = models.PositiveIntegerField(default=0)
+    phd_count = models.PositiveIntegerField(default=0)
+    researchers_total = models.PositiveIntegerField(default=0)
+    assistants_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["supervisor", "bucket"], name="uniq_supervisor_load_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["bucket", "researchers_total"]),
+        ]
+
+    def __str__(self):
+        return f"{self.supervisor_id} [{self.bucket}] {self.researchers_total}+{self.assistants_count}"
+
+
+class ResearchDepartmentScope(models.Model):
+    """
+    ✅ البحث ده يخص القسم ده (مربوط بمشرف نشط من القسم)
+    - صف واحد لكل (بحث، قسم) -> نطاق يوزر القسم join بالـ index من غير DISTINCT
+    - بيتحدث مع تغيير الروابط أو قسم/نشاط المشرف (signals + الاستيراد)
+    - إعادة بناء كاملة: python manage.py rebuild_research_scope
+    """
+    research = models.ForeignKey(Research, on_delete=models.CASCADE, related_name="department_scopes")
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="research_scopes")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["department", "research"], name="uniq_research_department_scope"),
+        ]
+        indexes = [
+            models.Index(fields=["research", "department"]),
+        ]
+
+    def __str__(self):
+        return f"{self.research_id} -> {self.department_id}"
+
+
+class ResearchSearchTerm(models.Model):
+    """
+    ✅ كلمات البحث (اسم الباحث + العنوان) بعد توحيد العربي (core.arabic)
+    - البحث بيبقى prefix على term (index) بدل LIKE '%q%' على TextField
+    - بيتحدث مع الحفظ/الاستيراد، وإعادة بناء: python manage.py rebuild_search_index
+    """
+    research = models.ForeignKey(Research, on_delete=models.CASCADE, related_name="search_terms")
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["research", "term"], name="uniq_research_search_term"),
+        ]
+        indexes = [
+            models.Index(fields=["term", "research"]),
+        ]
+
+    def __str__(self):
+        return f"{self.research_id}: {self.term}"
+
+
+class SupervisorSearchTerm(models.Model):
+    """✅ كلمات البحث لاسم المشرف (نفس فكرة ResearchSearchTerm)."""
+    supervisor = models.ForeignKey(Supervisor, on_delete=models.CASCADE, related_name="search_terms")
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["supervisor", "term"], name="uniq_supervisor_search_term"),
+        ]
+        indexes = [
+            models.Index(fields=["term", "supervisor"]),
+        ]
+
+    def __str__(self):
+        return f"{self.supervisor_id}: {self.term}"
+
+
+class ResearchTitleBand(models.Model):
+    """
+    ✅ مفاتيح LSH لعنوان البحث (MinHash على shingles العنوان بعد توحيد العربي - core.near_duplicates)
+    - العنوانين اللي بيشتركوا في مفتاح واحد على الأقل بس هما اللي بيتقارنوا
+    - بيتحدث مع الحفظ/الاستيراد، وإعادة بناء: python manage.py find_near_duplicates --rebuild
+    """
+    research = models.ForeignKey(Research, on_delete=models.CASCADE, related_name="title_bands")
+    band_key = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["research", "band_key"], name="uniq_research_title_band"),
+        ]
+        indexes = [
+            models.Index(fields=["band_key", "research"]),
+        ]
+
+    def __str__(self):
+        return f"{self.research_id}: {self.band_key}"
+
+
+class ResearchNearDuplicate(models.Model):
+    """
+    ✅ أبحاث عناوينها شبه متطابقة (حرف/همزة/علامة ترقيم) - للمراجعة قبل الدمج
+    - research_id < other_id دايمًا (الزوج بيتسجل مرة واحدة)
+    - score = Jaccard على shingles العنوان
+    """
+    research = models.ForeignKey(Research, on_delete=models.CASCADE, related_name="near_duplicates")
+    other = models.ForeignKey(Research, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-score", "research_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["research", "other"], name="uniq_research_near_duplicate"),
+        ]
+
+    def __str__(self):
+        return f"{self.research_id} ~ {self.other_id} ({self.score:.2f})"
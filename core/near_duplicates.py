@@ -0,0 +1,201 @@
+# =========================================
+# file: core/near_duplicates.py
+# =========================================
+"""
+الأبحاث المتكررة بعنوان "شبه" متطابق (حرف زيادة، همزة، علامة ترقيم) - الـ title_hash مش بيمسكها:
+- العنوان بيتوحد (core.arabic) ويتقسم shingles (كل 4 حروف ورا بعض)
+- MinHash signature (NUM_PERM قيمة) بتقرّب الـ Jaccard بين أي عنوانين
+- LSH: الـ signature بتتقسم BANDS band، وكل band = مفتاح في ResearchTitleBand (index)
+  -> العنوانين بيتقارنوا بس لو اشتركوا في مفتاح (بدل مقارنة كل اتنين)
+- المرشحين بيتأكدوا بالـ Jaccard الحقيقي على الـ shingles قبل ما يتسجلوا في ResearchNearDuplicate
+"""
+import hashlib
+import random
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.arabic import normalize_arabic
+from core.models import Research, ResearchNearDuplicate, ResearchTitleBand
+
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16                    # 16 band × 4 صفوف -> الزوج بيترشح غالبًا من Jaccard ~0.5 وطالع
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.8
+INDEX_CHUNK_SIZE = 500
+MAX_BUCKET_SIZE = 200         # مفتاح مشترك بين عناوين كتير جدًا (عنوان عام) مش بيرشّح أزواج
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)   # ثابت: نفس العنوان = نفس المفاتيح في كل process
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+Pair = Tuple[int, int]
+
+
+def title_shingles(title: str) -> FrozenSet[str]:
+    text = " ".join(normalize_arabic(title).split())
+    if len(text) <= SHINGLE_SIZE:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash_signature(shingles: Iterable[str]) -> Tuple[int, ...]:
+    hashes = [_hash64(s) % _PRIME for s in shingles]
+    if not hashes:
+        return ()
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def title_band_keys(title: str) -> List[int]:
+    """مفتاح (signed 64-bit) لكل band - العنوان الفاضي ملوش مفاتيح."""
+    signature = minhash_signature(title_shingles(title))
+    if not signature:
+        return []
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        raw = f"{band}:" + ",".join(map(str, chunk))
+        keys.append(int.from_bytes(hashlib.blake2b(raw.encode(), digest_size=8).digest(), "big", signed=True))
+    return keys
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _chunks(ids, size):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+# -----------------------------------
+# الفهرس (ResearchTitleBand)
+# -----------------------------------
+def index_title_bands(research_ids: Optional[Iterable[int]] = None, chunk_size: int = INDEX_CHUNK_SIZE) -> int:
+    """يعيد بناء مفاتيح العناوين للأبحاث دي (أو الكل لو None) على دفعات. بيرجّع عدد الأبحاث."""
+    if research_ids is None:
+        research_ids = Research.objects.order_by("id").values_list("id", flat=True)
+    done = 0
+    for ids in _chunks(research_ids, chunk_size):
+        rows = Research.objects.filter(id__in=ids).values_list("id", "title")
+        objs = [
+            ResearchTitleBand(research_id=rid, band_key=key)
+            for rid, title in rows
+            for key in title_band_keys(title)
+        ]
+        with transaction.atomic():
+            ResearchTitleBand.objects.filter(research_id__in=ids).delete()
+            ResearchTitleBand.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+        done += len(ids)
+    return done
+
+
+# -----------------------------------
+# المرشحين + التأكيد
+# -----------------------------------
+def _pairs_from_buckets(buckets: Iterable[List[int]]) -> Set[Pair]:
+    pairs = set()
+    for members in buckets:
+        if len(members) < 2 or len(members) > MAX_BUCKET_SIZE:
+            continue
+        members = sorted(set(members))
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pairs.add((members[x], members[y]))
+    return pairs
+
+
+def _all_candidate_pairs() -> Set[Pair]:
+    """الجدول كله: المفاتيح مرتبة من الـ index، والأبحاث اللي ليها نفس المفتاح ورا بعض."""
+    def buckets():
+        current, members = None, []
+        rows = ResearchTitleBand.objects.order_by("band_key", "research_id").values_list("band_key", "research_id")
+        for key, rid in rows.iterator(chunk_size=5000):
+            if key != current:
+                yield members
+                current, members = key, []
+            members.append(rid)
+        yield members
+
+    return _pairs_from_buckets(buckets())
+
+
+def _candidate_pairs_for(research_ids: Iterable[int]) -> Set[Pair]:
+    """أبحاث معينة (الاستيراد): بس المفاتيح بتاعتها، من غير ما نلف على الجدول."""
+    research_ids = list(research_ids)
+    keys = set()
+    for ids in _chunks(research_ids, INDEX_CHUNK_SIZE):
+        keys.update(ResearchTitleBand.objects.filter(research_id__in=ids).values_list("band_key", flat=True))
+
+    buckets: Dict[int, List[int]] = defaultdict(list)
+    for batch in _chunks(keys, INDEX_CHUNK_SIZE):
+        for key, rid in ResearchTitleBand.objects.filter(band_key__in=batch).values_list("band_key", "research_id"):
+            buckets[key].append(rid)
+
+    wanted = set(research_ids)
+    return {pair for pair in _pairs_from_buckets(buckets.values()) if pair[0] in wanted or pair[1] in wanted}
+
+
+def _verify(pairs: Set[Pair], threshold: float) -> List[Tuple[int, int, float]]:
+    shingles: Dict[int, FrozenSet[str]] = {}
+    for ids in _chunks({rid for pair in pairs for rid in pair}, INDEX_CHUNK_SIZE):
+        for rid, title in Research.objects.filter(id__in=ids).values_list("id", "title"):
+            shingles[rid] = title_shingles(title)
+
+    found = []
+    for a, b in sorted(pairs):
+        if a in shingles and b in shingles:
+            score = jaccard(shingles[a], shingles[b])
+            if score >= threshold:
+                found.append((a, b, round(score, 3)))
+    return found
+
+
+def find_near_duplicates(research_ids: Optional[Iterable[int]] = None,
+                         threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[int, int, float]]:
+    """
+    [(research_id, other_id, score)] بـ research_id < other_id.
+    research_ids = None -> الجدول كله، وإلا الأزواج اللي فيها واحد من الأبحاث دي بس.
+    """
+    pairs = _all_candidate_pairs() if research_ids is None else _candidate_pairs_for(research_ids)
+    return _verify(pairs, threshold)
+
+
+def record_near_duplicates(found: List[Tuple[int, int, float]]) -> int:
+    ResearchNearDuplicate.objects.bulk_create(
+        [ResearchNearDuplicate(research_id=a, other_id=b, score=score) for a, b, score in found],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(found)
+
+
+def clear_near_duplicates(research_ids: Iterable[int]) -> int:
+    """يمسح الأزواج اللي فيها بحث من دول (من الناحيتين) - العنوان اتغير فالأزواج القديمة مبقتش صح."""
+    deleted = 0
+    for ids in _chunks(research_ids, INDEX_CHUNK_SIZE):
+        deleted += ResearchNearDuplicate.objects.filter(Q(research_id__in=ids) | Q(other_id__in=ids)).delete()[0]
+    return deleted
+
+
+def flag_near_duplicates(research_ids: Iterable[int], threshold: float = DEFAULT_THRESHOLD) -> int:
+    """للاستيراد/الحفظ: يفهرس الأبحاث الجديدة/اللي عنوانها اتغير ويسجل شبه المكرر ليها من الأول."""
+    research_ids = list(research_ids)
+    if not research_ids:
+        return 0
+    index_title_bands(research_ids)
+    found = find_near_duplicates(research_ids, threshold)
+    with transaction.atomic():
+        clear_near_duplicates(research_ids)
+        return record_near_duplicates(found)
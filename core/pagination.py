@@ -0,0 +1,58 @@
+# =========================================
+# file: core/pagination.py
+# =========================================
+"""
+Keyset (cursor) pagination بالـ id تنازليًا:
+- الصفحة التالية: ?after=<آخر id في الصفحة>  -> WHERE id < after
+- الصفحة السابقة: ?before=<أول id في الصفحة> -> WHERE id > before
+من غير OFFSET ولا COUNT، فتكلفة أي صفحة = تكلفة أول صفحة.
+"""
+from typing import Any, List, NamedTuple, Optional
+
+
+class KeysetPage(NamedTuple):
+    items: List[Any]
+    next_after: Optional[int]     # None = مفيش صفحة بعدها
+    prev_before: Optional[int]    # None = دي أول صفحة
+
+
+def parse_cursor(raw) -> Optional[int]:
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def parse_page_size(raw, default: int, maximum: int = 500) -> int:
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(value, maximum))
+
+
+def _item_id(item) -> int:
+    return item["id"] if isinstance(item, dict) else item.pk
+
+
+def keyset_page(qs, after: Optional[int] = None, before: Optional[int] = None, size: int = 50) -> KeysetPage:
+    """qs ممكن يكون objects أو values() (لازم فيه id)."""
+    if before:
+        rows = list(qs.filter(id__gt=before).order_by("id")[: size + 1])
+        has_prev = len(rows) > size
+        rows = rows[:size][::-1]
+        has_next = bool(rows)
+    else:
+        if after:
+            qs = qs.filter(id__lt=after)
+        rows = list(qs.order_by("-id")[: size + 1])
+        has_next = len(rows) > size
+        rows = rows[:size]
+        has_prev = bool(after)
+
+    return KeysetPage(
+        items=rows,
+        next_after=_item_id(rows[-1]) if has_next and rows else None,
+        prev_before=_item_id(rows[0]) if has_prev and rows else None,
+    )
@@ -0,0 +1,176 @@
+# =========================================
+# file: core/research_dedupe.py
+# =========================================
+"""
+دمج الأبحاث المتكررة (نفس الاسم بعد strip + نفس العنوان بعد canonical_title + degree + researcher_type):
+- المفتاح المخزن (researcher_name + title_hash + ...) عليه unique constraint فمستحيل يتكرر؛
+  المكرر الحقيقي = اسم بمسافات زيادة في الأول/الآخر، أو title_hash قديم (قبل الـ canonicalization)
+- المرشحين بيطلعوا من SQL (Window COUNT على Trim(الاسم) + degree + researcher_type) مرتبين،
+  وجوه كل مرشح العنوان بيتجمّع بـ compute_title_hash(title) من العنوان نفسه مش من العمود
+- كل CHUNK_SIZE جروب في transaction لوحدها (الموقع مش بيتقفل على الجدول لدقايق)
+- الروابط: INSERT IGNORE على البحث الأساسي، والمصروفات: UPDATE بالجملة (bulk_update)
+- المسح بالجملة والـ signals ساكتة (muted_signals)، وعدادات المشرفين/نطاق الأقسام/الإصدار
+  بيتحدثوا مرة واحدة لكل chunk
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Window
+from django.db.models.functions import Trim
+
+from core.data_version import bump_data_version
+from core.models import Research, ResearchFeePayment, ResearchSupervision, compute_title_hash
+from core.research_scope import refresh_research_scopes
+from core.signals import muted_signals
+from core.supervisor_load import refresh_supervisor_loads
+
+
+# المرشحين: نفس الاسم (بعد strip) ونفس المرحلة/النوع، والعنوان بيتقارن جوه المرشح
+CANDIDATE_FIELDS = ("name_key", "degree", "researcher_type")
+CHUNK_SIZE = 200
+
+# (keep_id, [dup_ids])
+Group = Tuple[int, List[int]]
+
+
+def iter_duplicate_groups() -> Iterator[Group]:
+    """
+    الجروبات اللي فيها أكتر من بحث، من query واحدة مرتبة بالمرشح (باحث له أكتر من بحث في نفس المرحلة).
+    الأساسي: أول واحد عنده قسم، وإلا الأقدم (نفس القاعدة القديمة).
+    الأبحاث اللي عنوانها فاضي مش بتدخل (عناوين مختلفة ممكن تتلم غلط).
+    """
+    rows = (
+        Research.objects.annotate(name_key=Trim("researcher_name"))
+        .annotate(group_size=Window(Count("id"), partition_by=list(CANDIDATE_FIELDS)))
+        .filter(group_size__gt=1)
+        .order_by(*CANDIDATE_FIELDS, "id")
+        .values_list("id", "department_id", "title", *CANDIDATE_FIELDS)
+    )
+
+    current, by_title = None, {}
+    for rid, dept_id, title, *key in rows.iterator(chunk_size=2000):
+        key = tuple(key)
+        if key != current:
+            yield from _groups_of(by_title)
+            current, by_title = key, {}
+        title_hash = compute_title_hash(title)
+        if title_hash:
+            by_title.setdefault(title_hash, []).append((rid, dept_id))
+    yield from _groups_of(by_title)
+
+
+def _groups_of(by_title: Dict[str, List[Tuple[int, Optional[int]]]]) -> Iterator[Group]:
+    for members in by_title.values():
+        if len(members) > 1:
+            yield _pick_keep(members)
+
+
+def _pick_keep(members: List[Tuple[int, Optional[int]]]) -> Group:
+    keep = next((rid for rid, dept_id in members if dept_id is not None), members[0][0])
+    return keep, [rid for rid, _ in members if rid != keep]
+
+
+def _chunks(items: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _merge_links(keep_of: Dict[int, int]) -> Tuple[int, set]:
+    """روابط المكرر على الأساسي (INSERT IGNORE) وبعدين مسح روابط المكرر. بيرجّع (عدد المنقول، المشرفين)."""
+    dup_ids = list(keep_of)
+    existing = set(
+        ResearchSupervision.objects.filter(research_id__in=set(keep_of.values())).values_list("research_id", "supervisor_id")
+    )
+    new_links = []
+    supervisors = set()
+    for rid, sid, role in ResearchSupervision.objects.filter(research_id__in=dup_ids).values_list(
+        "research_id", "supervisor_id", "role"
+    ):
+        supervisors.add(sid)
+        pair = (keep_of[rid], sid)
+        if pair in existing:
+            continue
+        existing.add(pair)
+        new_links.append(ResearchSupervision(research_id=pair[0], supervisor_id=sid, role=role))
+
+    ResearchSupervision.objects.bulk_create(new_links, batch_size=1000, ignore_conflicts=True)
+
+    # ✅ مسح بالجملة جوه muted_signals (merge_groups): العدادات/النطاق/الإصدار مرة واحدة للـ chunk
+    ResearchSupervision.objects.filter(research_id__in=dup_ids).delete()
+    return len(new_links), supervisors
+
+
+def _merge_fee_payments(keep_of: Dict[int, int]) -> int:
+    """
+    لكل (الأساسي، سنة): لو مالوش سجل -> سجل المكرر بيتنقل عليه (المدفوع الأول)،
+    ولو عنده سجل مش مدفوع والمكرر مدفوع -> بيتعلم مدفوع. بيرجّع عدد السجلات المنقولة.
+    """
+    keep_ids = set(keep_of.values())
+    payments = list(
+        ResearchFeePayment.objects.filter(research_id__in=list(keep_ids) + list(keep_of))
+        .order_by("-is_paid", "id")
+        .only("id", "research_id", "year", "is_paid", "paid_at")
+    )
+    by_year = {(p.research_id, p.year): p for p in payments if p.research_id in keep_ids}
+
+    moved, upgraded = [], []
+    for p in payments:
+        if p.research_id in keep_ids:
+            continue
+        target = (keep_of[p.research_id], p.year)
+        current = by_year.get(target)
+        if current is None:
+            p.research_id = target[0]
+            by_year[target] = p
+            moved.append(p)
+        elif p.is_paid and not current.is_paid:
+            current.is_paid = True
+            current.paid_at = p.paid_at
+            upgraded.append(current)
+
+    ResearchFeePayment.objects.bulk_update(moved, ["research"], batch_size=500)
+    ResearchFeePayment.objects.bulk_update(upgraded, ["is_paid", "paid_at"], batch_size=500)
+    return len(moved)
+
+
+def merge_groups(groups: List[Group]) -> Dict[str, int]:
+    """chunk واحد (transaction واحدة)."""
+    keep_of = {dup: keep for keep, dups in groups for dup in dups}
+    with transaction.atomic(), muted_signals():
+        links_moved, supervisors = _merge_links(keep_of)
+        fees_moved = _merge_fee_payments(keep_of)
+        Research.objects.filter(id__in=list(keep_of)).delete()
+
+    refresh_supervisor_loads(supervisors)
+    refresh_research_scopes({keep for keep, _ in groups})
+    bump_data_version()
+    return {
+        "groups": len(groups),
+        "deleted": len(keep_of),
+        "links_moved": links_moved,
+        "fees_moved": fees_moved,
+    }
+
+
+def dedupe_researches(chunk_size: int = CHUNK_SIZE, dry_run: bool = False,
+                      progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+    totals = {"groups": 0, "deleted": 0, "links_moved": 0, "fees_moved": 0}
+
+    # ✅ الجروبات بتتقرا كلها الأول (ids بس) علشان الكتابة ما تأثرش على الـ cursor المفتوح
+    groups = list(iter_duplicate_groups())
+    for chunk in _chunks(iter(groups), chunk_size):
+        if dry_run:
+            result = {"groups": len(chunk), "deleted": sum(len(dups) for _, dups in chunk), "links_moved": 0, "fees_moved": 0}
+        else:
+            result = merge_groups(chunk)
+        for name, value in result.items():
+            totals[name] += value
+        if progress:
+            progress(totals)
+    return totals
@@ -0,0 +1,52 @@
+# =========================================
+# file: core/research_scope.py
+# =========================================
+"""
+نطاق الأبحاث لكل قسم (ResearchDepartmentScope):
+البحث في نطاق القسم لو مربوط بمشرف نشط قسمه = القسم ده (نفس قاعدة get_research_scope_qs القديمة).
+"""
+from typing import Iterable, Optional
+
+from django.db import transaction
+
+from core.models import ResearchDepartmentScope, ResearchSupervision
+
+
+def refresh_research_scopes(research_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    يعيد حساب نطاق الأبحاث دي (أو الكل لو None) ويرجّع عدد صفوف النطاق المطلوبة.
+    """
+    links = ResearchSupervision.objects.filter(supervisor__is_active=True, supervisor__department__isnull=False)
+    scopes = ResearchDepartmentScope.objects.all()
+    if research_ids is not None:
+        research_ids = {int(i) for i in research_ids if i is not None}
+        if not research_ids:
+            return 0
+        links = links.filter(research_id__in=research_ids)
+        scopes = scopes.filter(research_id__in=research_ids)
+
+    wanted = set(links.values_list("research_id", "supervisor__department_id").distinct())
+    existing = set(scopes.values_list("research_id", "department_id"))
+
+    with transaction.atomic():
+        stale = existing - wanted
+        if stale:
+            for dept_id in {d for _, d in stale}:
+                scopes.filter(department_id=dept_id, research_id__in=[r for r, d in stale if d == dept_id]).delete()
+
+        ResearchDepartmentScope.objects.bulk_create(
+            [ResearchDepartmentScope(research_id=r, department_id=d) for r, d in wanted - existing],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+    return len(wanted)
+
+
+def refresh_supervisor_research_scopes(supervisor_ids: Iterable[int]) -> int:
+    """قسم/نشاط المشرف اتغير -> كل أبحاثه."""
+    supervisor_ids = [i for i in supervisor_ids if i is not None]
+    if not supervisor_ids:
+        return 0
+    return refresh_research_scopes(
+        ResearchSupervision.objects.filter(supervisor_id__in=supervisor_ids).values_list("research_id", flat=True)
+    )
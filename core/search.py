@@ -0,0 +1,84 @@
+# =========================================
+# file: core/search.py
+# =========================================
+"""
+البحث بالكلمات (ResearchSearchTerm / SupervisorSearchTerm):
+- النص بيتوحد ويتقسم كلمات (core.arabic.index_terms: الكلمة + من غير و/ب/ال...) وكل كلمة في صف
+- الاستعلام: كل كلمة في q لازم تكون بداية كلمة في السجل (term LIKE 'x%' على الـ index)
+  فـ "احمد مح" بيلاقي "أحمد محمد ..."، و "العاب" بيلاقي "ألعاب"
+- q من غير ولا كلمة (رموز بس زي "-" أو "/") بيرجع للـ icontains القديم بدل نتيجة فاضية
+"""
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.arabic import index_terms, tokenize
+from core.models import Research, ResearchSearchTerm, Supervisor, SupervisorSearchTerm
+
+
+INDEX_CHUNK_SIZE = 500
+
+
+def research_terms(researcher_name: str, title: str):
+    return index_terms(f"{researcher_name or ''} {title or ''}")
+
+
+def search_researches(qs, q: str):
+    """الأبحاث اللي فيها كل كلمات q (prefix لكل كلمة)."""
+    tokens = tokenize(q)
+    if not tokens:
+        q = (q or "").strip()
+        return qs.filter(Q(researcher_name__icontains=q) | Q(title__icontains=q)) if q else qs
+    for token in tokens:
+        qs = qs.filter(id__in=ResearchSearchTerm.objects.filter(term__startswith=token).values("research_id"))
+    return qs
+
+
+def search_supervisors(qs, q: str):
+    tokens = tokenize(q)
+    if not tokens:
+        q = (q or "").strip()
+        return qs.filter(name__icontains=q) if q else qs
+    for token in tokens:
+        qs = qs.filter(id__in=SupervisorSearchTerm.objects.filter(term__startswith=token).values("supervisor_id"))
+    return qs
+
+
+def _chunks(ids, size):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def index_researches(research_ids: Optional[Iterable[int]] = None, chunk_size: int = INDEX_CHUNK_SIZE) -> int:
+    """يعيد بناء كلمات الأبحاث دي (أو الكل لو None) على دفعات. بيرجّع عدد الأبحاث."""
+    if research_ids is None:
+        research_ids = Research.objects.order_by("id").values_list("id", flat=True)
+    done = 0
+    for ids in _chunks(research_ids, chunk_size):
+        rows = Research.objects.filter(id__in=ids).values_list("id", "researcher_name", "title")
+        objs = [
+            ResearchSearchTerm(research_id=rid, term=term)
+            for rid, name, title in rows
+            for term in research_terms(name, title)
+        ]
+        with transaction.atomic():
+            ResearchSearchTerm.objects.filter(research_id__in=ids).delete()
+            ResearchSearchTerm.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+        done += len(ids)
+    return done
+
+
+def index_supervisors(supervisor_ids: Optional[Iterable[int]] = None, chunk_size: int = INDEX_CHUNK_SIZE) -> int:
+    if supervisor_ids is None:
+        supervisor_ids = Supervisor.objects.order_by("id").values_list("id", flat=True)
+    done = 0
+    for ids in _chunks(supervisor_ids, chunk_size):
+        rows = Supervisor.objects.filter(id__in=ids).values_list("id", "name")
+        objs = [SupervisorSearchTerm(supervisor_id=sid, term=term) for sid, name in rows for term in index_terms(name)]
+        with transaction.atomic():
+            SupervisorSearchTerm.objects.filter(supervisor_id__in=ids).delete()
+            SupervisorSearchTerm.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
+        done += len(ids)
+    return done
@@ -0,0 +1,116 @@
+# =========================================
+# file: core/signals.py
+# =========================================
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.data_version import bump_data_version
+from core.models import Department, Research, ResearchSupervision, Supervisor
+from core.near_duplicates import flag_near_duplicates
+from core.research_scope import refresh_research_scopes, refresh_supervisor_research_scopes
+from core.search import index_researches, index_supervisors
+from core.supervisor_load import refresh_supervisor_loads
+
+
+_state = threading.local()
+
+
+@contextmanager
+def muted_signals():
+    """
+    ✅ للعمليات بالجملة (زي دمج المكرر): الـ receivers اللي تحت مش بتعمل حاجة جوه الـ block،
+    واللي بينادي مسؤول يحدّث العدادات/النطاق/الإصدار مرة واحدة بعدها.
+    """
+    previous = getattr(_state, "muted", False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = previous
+
+
+def signals_muted() -> bool:
+    return getattr(_state, "muted", False)
+
+
+# ✅ أي حفظ/حذف في الداتا الأساسية بيزوّد إصدار الداتا (وبالتالي بيلغي الكاش)
+@receiver(post_save, sender=Research)
+@receiver(post_save, sender=Supervisor)
+@receiver(post_save, sender=ResearchSupervision)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Research)
+@receiver(post_delete, sender=Supervisor)
+@receiver(post_delete, sender=ResearchSupervision)
+@receiver(post_delete, sender=Department)
+def bump_dataset_version(sender, **kwargs):
+    if signals_muted():
+        return
+    bump_data_version()
+
+
+# ✅ عدادات SupervisorLoad: إعادة حساب المشرفين المتأثرين بس
+@receiver(post_save, sender=ResearchSupervision)
+@receiver(post_delete, sender=ResearchSupervision)
+def refresh_link_supervisor_load(sender, instance, **kwargs):
+    if signals_muted():
+        return
+    refresh_supervisor_loads([instance.supervisor_id])
+
+
+@receiver(post_save, sender=Research)
+def refresh_research_supervisors_load(sender, instance, created, **kwargs):
+    # بحث جديد ملوش روابط لسه؛ الحالة/المرحلة/النوع بيغيروا الـ buckets
+    if created or signals_muted():
+        return
+    refresh_supervisor_loads(
+        ResearchSupervision.objects.filter(research_id=instance.pk).values_list("supervisor_id", flat=True)
+    )
+
+
+# ✅ نطاق الأقسام (ResearchDepartmentScope): الروابط أو قسم/نشاط المشرف اتغيروا
+@receiver(post_save, sender=ResearchSupervision)
+@receiver(post_delete, sender=ResearchSupervision)
+def refresh_link_research_scope(sender, instance, **kwargs):
+    if signals_muted():
+        return
+    refresh_research_scopes([instance.research_id])
+
+
+@receiver(post_save, sender=Supervisor)
+def refresh_supervisor_scope(sender, instance, created, **kwargs):
+    # مشرف جديد ملوش روابط لسه
+    if created or signals_muted():
+        return
+    refresh_supervisor_research_scopes([instance.pk])
+
+
+# ✅ كلمات البحث (الاسم/العنوان اتغيروا)
+@receiver(post_save, sender=Research)
+def index_research_terms(sender, instance, update_fields=None, **kwargs):
+    if signals_muted():
+        return
+    if update_fields is not None and not {"researcher_name", "title"} & set(update_fields):
+        return
+    index_researches([instance.pk])
+
+
+@receiver(post_save, sender=Supervisor)
+def index_supervisor_terms(sender, instance, update_fields=None, **kwargs):
+    if signals_muted():
+        return
+    if update_fields is not None and "name" not in update_fields:
+        return
+    index_supervisors([instance.pk])
+
+
+# ✅ مفاتيح LSH للعنوان + أزواج شبه المكرر (القديمة بتتمسح لو العنوان اتغير)
+@receiver(post_save, sender=Research)
+def index_research_title_bands(sender, instance, update_fields=None, **kwargs):
+    if signals_muted():
+        return
+    if update_fields is not None and "title" not in update_fields:
+        return
+    flag_near_duplicates([instance.pk])
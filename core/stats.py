@@ -0,0 +1,119 @@
+# =========================================
+# file: core/stats.py
+# =========================================
+"""
+إحصائيات الأقسام بعدد queries ثابت (مش بيزيد مع عدد الأقسام أو المشرفين):
+- department_breakdown: قسم × مرحلة × نوع في query واحدة مجمعة (conditional aggregation)
+- department_dashboard: لوحة القسم في الرئيسية (المشرفين + الإجماليات + الرسم البياني)
+"""
+from typing import List, Optional
+
+from django.db.models import Count, Q
+
+from core.models import Department, Research, ResearchSupervision, Supervisor, SupervisorLoad
+from core.supervisor_load import BUCKET_FILTERS, bucket_for, with_load
+
+
+MA = Q(research__degree=Research.Degree.MA)
+PHD = Q(research__degree=Research.Degree.PHD)
+RESEARCHER = Q(research__researcher_type=Research.ResearcherType.RESEARCHER)
+ASSISTANT = Q(research__researcher_type=Research.ResearcherType.ASSISTANT)
+
+# الخلايا (مرحلة × نوع) - البحث له مرحلة واحدة ونوع واحد، فالمجاميع بتطلع منها بالجمع
+CELLS = {
+    "ma_researchers": MA & RESEARCHER,
+    "ma_assistants": MA & ASSISTANT,
+    "phd_researchers": PHD & RESEARCHER,
+    "phd_assistants": PHD & ASSISTANT,
+}
+
+
+def department_breakdown(sf: Optional[str] = "active", department_id: Optional[int] = None) -> List[Department]:
+    """
+    الأبحاث المرتبطة بمشرفين القسم النشطين (حسب sf)، مرتبة بالإجمالي تنازليًا.
+    بيرجّع Department objects (من غير query تانية) عليها:
+    total / ma / phd / researchers / assistants + خلايا CELLS.
+    البحث بيتعد مرة واحدة في القسم حتى لو ليه أكتر من مشرف فيه (distinct).
+    """
+    links = ResearchSupervision.objects.filter(
+        supervisor__is_active=True,
+        supervisor__department__isnull=False,
+    ).filter(BUCKET_FILTERS[bucket_for(sf)])
+
+    if department_id:
+        links = links.filter(supervisor__department_id=int(department_id))
+
+    rows = (
+        links.values("supervisor__department_id", "supervisor__department__name")
+        .annotate(
+            total=Count("research_id", distinct=True),
+            **{name: Count("research_id", filter=cond, distinct=True) for name, cond in CELLS.items()},
+        )
+        .order_by()
+    )
+
+    departments = []
+    for row in rows:
+        if not row["total"]:
+            continue
+        dept = Department(id=row["supervisor__department_id"], name=row["supervisor__department__name"])
+        dept.total = row["total"]
+        for name in CELLS:
+            setattr(dept, name, row[name])
+        dept.ma = dept.ma_researchers + dept.ma_assistants
+        dept.phd = dept.phd_researchers + dept.phd_assistants
+        dept.researchers = dept.ma_researchers + dept.phd_researchers
+        dept.assistants = dept.ma_assistants + dept.phd_assistants
+        departments.append(dept)
+
+    departments.sort(key=lambda d: (-d.total, d.id))
+    return departments
+
+
+def department_dashboard(dept: Department) -> dict:
+    """
+    بيانات لوحة القسم في الرئيسية (الحاليين فقط) في 2 queries ثابتين مهما كان عدد المشرفين:
+    - المشرفين + عداداتهم من SupervisorLoad (قراءة بالـ index)
+    - إجماليات القسم من department_breakdown (البحث المشترك بين مشرفين بيتعد مرة واحدة)
+    بيرجّع {"supervisors", "stats", "chart_data"}.
+    """
+    supervisors = list(
+        with_load(Supervisor.objects.filter(department=dept, is_active=True), SupervisorLoad.Bucket.ACTIVE)
+        .order_by("id")
+    )
+    for s in supervisors:
+        s.total_count = s.ma_count + s.phd_count
+    supervisors.sort(key=lambda s: s.total_count, reverse=True)
+
+    totals = department_breakdown(SupervisorLoad.Bucket.ACTIVE, department_id=dept.id)
+    row = totals[0] if totals else None
+    stats = {
+        "total": row.researchers if row else 0,
+        "phd": row.phd_researchers if row else 0,
+        "ma": row.ma_researchers if row else 0,
+        "assistants": row.assistants if row else 0,
+    }
+
+    chart_data = {"labels": [], "phd": [], "ma": [], "assistants": []}
+    for s in supervisors:
+        short_name = " ".join((s.name or "").split()[:2]) or (s.name or "")
+        chart_data["labels"].append(short_name)
+        chart_data["phd"].append(s.phd_count)
+        chart_data["ma"].append(s.ma_count)
+        chart_data["assistants"].append(s.assistants_count)
+
+    return {"supervisors": supervisors, "stats": stats, "chart_data": chart_data}
+
+
+def research_facets(researches) -> dict:
+    """
+    الإجمالي + العدد لكل حالة ولكل مرحلة في query واحدة مجمعة (status × degree).
+    researches لازم يكون من غير DISTINCT/joins بتكرر الصفوف (نطاق الأقسام join مش بيكرر).
+    """
+    facets = {"total": 0, "by_status": {}, "by_degree": {}}
+    for row in researches.order_by().values("status", "degree").annotate(n=Count("id")):
+        n = row["n"]
+        facets["total"] += n
+        facets["by_status"][row["status"]] = facets["by_status"].get(row["status"], 0) + n
+        facets["by_degree"][row["degree"]] = facets["by_degree"].get(row["degree"], 0) + n
+    return facets
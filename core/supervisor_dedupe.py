@@ -0,0 +1,245 @@
+# =========================================
+# file: core/supervisor_dedupe.py
+# =========================================
+"""
+دمج المشرفين المتكررين (fuzzy):
+1) الاسم بيتوحد (core.arabic) + شيل الألقاب (د. / أ.د. / أ.م.د. / دكتور ...) + "عبد الله" = "عبدالله"
+2) blocking: المقارنة بتحصل بس جوه نفس الـ block (أول كلمتين في الاسم)
+   + sorted neighborhood (ترتيب الأسماء ومقارنة كل اسم بالـ window اللي بعده) للأخطاء في الكلمة التانية
+   -> O(n log n) تقريبًا بدل مقارنة كل اتنين
+3) score لكل زوج (SequenceMatcher + الاسم الأقصر جزء من أول الاسم الأطول)
+4) خطة دمج (JSON) بتتراجع يدويًا (approved: true/false)، وبعدين apply بـ UPDATE بالجملة على ResearchSupervision
+"""
+import json
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from django.db import transaction
+from django.db.models import Count
+
+from core.arabic import normalize_arabic
+from core.data_version import bump_data_version
+from core.models import ResearchSupervision, Supervisor
+from core.research_scope import refresh_research_scopes
+from core.supervisor_load import refresh_supervisor_loads
+
+
+# بعد normalize_arabic: "أ.م.د/" -> "ا م د"
+TITLE_TOKENS = {
+    "ا", "د", "م", "دكتور", "دكتوره", "الدكتور", "الدكتوره",
+    "استاذ", "استاذه", "الاستاذ", "الاستاذه", "مدرس", "dr", "prof",
+}
+
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_WINDOW = 5
+MAX_BLOCK_SIZE = 300
+
+
+def canonical_name(name: str) -> str:
+    tokens = normalize_arabic(name).split()
+    while tokens and tokens[0] in TITLE_TOKENS:
+        tokens.pop(0)
+    # "عبد الله" / "ابو بكر" -> كلمة واحدة
+    out = []
+    for token in tokens:
+        if out and out[-1] in ("عبد", "ابو"):
+            out[-1] += token
+        else:
+            out.append(token)
+    return " ".join(out)
+
+
+def blocking_key(canonical: str) -> str:
+    return " ".join(canonical.split()[:2])
+
+
+def similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    ta, tb = a.split(), b.split()
+    short, long_ = (ta, tb) if len(ta) <= len(tb) else (tb, ta)
+    # "محمد احمد علي" vs "محمد احمد علي حسن" (الاسم الرباعي)
+    if len(short) >= 3 and long_[:len(short)] == short:
+        return 0.95
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class Candidate(NamedTuple):
+    id: int
+    name: str
+    canonical: str
+    department_id: int
+    links: int
+
+
+class MergeGroup(NamedTuple):
+    keep: Candidate
+    merge: List[Tuple[Candidate, float]]   # (المشرف، أعلى score مع الجروب)
+
+
+def _load_candidates() -> List[Candidate]:
+    rows = (
+        Supervisor.objects.annotate(links=Count("researchsupervision"))
+        .order_by("id")
+        .values_list("id", "name", "department_id", "links")
+    )
+    return [Candidate(sid, name, canonical_name(name), dept_id, links) for sid, name, dept_id, links in rows]
+
+
+def candidate_pairs(candidates: List[Candidate], window: int = DEFAULT_WINDOW) -> Iterable[Tuple[int, int]]:
+    """أزواج (index, index) للمقارنة: نفس الـ block + الجيران بعد الترتيب."""
+    seen = set()
+
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for i, c in enumerate(candidates):
+        if c.canonical:
+            blocks[blocking_key(c.canonical)].append(i)
+    for members in blocks.values():
+        members = members[:MAX_BLOCK_SIZE]
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                seen.add(pair)
+                yield pair
+
+    order = sorted((i for i, c in enumerate(candidates) if c.canonical), key=lambda i: candidates[i].canonical)
+    for pos, i in enumerate(order):
+        for j in order[pos + 1:pos + 1 + window]:
+            pair = (min(i, j), max(i, j))
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+def find_duplicate_groups(threshold: float = DEFAULT_THRESHOLD, window: int = DEFAULT_WINDOW) -> List[MergeGroup]:
+    candidates = _load_candidates()
+
+    parent = list(range(len(candidates)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidate_pairs(candidates, window):
+        if similarity(candidates[i].canonical, candidates[j].canonical) >= threshold:
+            parent[find(i)] = find(j)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(candidates)):
+        clusters[find(i)].append(i)
+
+    groups = []
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        items = [candidates[i] for i in members]
+        # اللي بيفضل: عنده قسم، وبعدين أكتر روابط، وبعدين الأقدم
+        keep = min(items, key=lambda c: (c.department_id is None, -c.links, c.id))
+        # الـ score مقابل اللي بيفضل نفسه (الجروب transitive: A~B~C مش معناه A~C)
+        merge = [(c, round(similarity(keep.canonical, c.canonical), 3)) for c in items if c.id != keep.id]
+        groups.append(MergeGroup(keep, sorted(merge, key=lambda m: m[0].id)))
+
+    return sorted(groups, key=lambda g: g.keep.canonical)
+
+
+# -----------------------------------
+# خطة الدمج (JSON للمراجعة)
+# -----------------------------------
+def plan_to_json(groups: List[MergeGroup]) -> list:
+    """
+    الجروب بيبقى approved تلقائيًا بس لو كل أسمائه متطابقة مع اسم اللي بيفضل بعد التوحيد،
+    وأي جروب فيه لينك تقريبي (حتى لو في النص) بيروح للمراجعة.
+    """
+    return [
+        {
+            "approved": all(c.canonical == g.keep.canonical for c, _ in g.merge),
+            "keep": {"id": g.keep.id, "name": g.keep.name, "links": g.keep.links},
+            "merge": [{"id": c.id, "name": c.name, "links": c.links, "score": score} for c, score in g.merge],
+        }
+        for g in groups
+    ]
+
+
+def write_plan(groups: List[MergeGroup], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan_to_json(groups), f, ensure_ascii=False, indent=2)
+
+
+def read_approved(path: str) -> List[Tuple[int, List[int]]]:
+    with open(path, encoding="utf-8") as f:
+        plan = json.load(f)
+    return [
+        (int(g["keep"]["id"]), [int(m["id"]) for m in g["merge"]])
+        for g in plan
+        if g.get("approved") and g.get("merge")
+    ]
+
+
+# -----------------------------------
+# التنفيذ
+# -----------------------------------
+def apply_merges(merges: List[Tuple[int, List[int]]]) -> Dict[str, int]:
+    """
+    لكل (keep, dups):
+    - الروابط اللي هتتكرر (نفس البحث مربوط بالـ keep أو باتنين dups) بتتمسح بالـ ids
+    - الباقي: UPDATE واحد supervisor_id = keep
+    - القسم بيتنقل للـ keep لو مالوش، والـ dups بتتمسح
+    """
+    counters = {"groups": 0, "deleted": 0, "links_moved": 0, "links_dropped": 0}
+    touched_research = set()
+    touched_supervisors = set()
+
+    for keep_id, dup_ids in merges:
+        dup_ids = [d for d in dup_ids if d != keep_id]
+        existing = set(Supervisor.objects.filter(id__in=[keep_id] + dup_ids).values_list("id", flat=True))
+        dup_ids = [d for d in dup_ids if d in existing]
+        if keep_id not in existing or not dup_ids:
+            continue
+
+        with transaction.atomic():
+            links = list(
+                ResearchSupervision.objects.filter(supervisor_id__in=[keep_id] + dup_ids)
+                .order_by("id")
+                .values_list("id", "research_id", "supervisor_id")
+            )
+            # رابط واحد لكل بحث: رابط الـ keep لو موجود، وإلا أقدم رابط
+            owner = {}
+            for link_id, research_id, supervisor_id in links:
+                if research_id not in owner or supervisor_id == keep_id:
+                    owner[research_id] = link_id
+            winners = set(owner.values())
+            drop = [link_id for link_id, _, _ in links if link_id not in winners]
+
+            if drop:
+                ResearchSupervision.objects.filter(id__in=drop).delete()
+            moved = ResearchSupervision.objects.filter(supervisor_id__in=dup_ids).update(supervisor_id=keep_id)
+
+            keep = Supervisor.objects.get(id=keep_id)
+            if keep.department_id is None:
+                dept_id = (
+                    Supervisor.objects.filter(id__in=dup_ids, department__isnull=False)
+                    .order_by("id").values_list("department_id", flat=True).first()
+                )
+                if dept_id:
+                    keep.department_id = dept_id
+                    keep.save(update_fields=["department"])
+
+            Supervisor.objects.filter(id__in=dup_ids).delete()
+
+        touched_research.update(research_id for _, research_id, _ in links)
+        touched_supervisors.add(keep_id)
+        counters["groups"] += 1
+        counters["deleted"] += len(dup_ids)
+        counters["links_moved"] += moved
+        counters["links_dropped"] += len(drop)
+
+    # ✅ UPDATE بالجملة مش بيبعت signals
+    if counters["groups"]:
+        refresh_supervisor_loads(touched_supervisors)
+        refresh_research_scopes(touched_research)
+        bump_data_version()
+
+    return counters
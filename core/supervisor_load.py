@@ -0,0 +1,99 @@
+# =========================================
+# file: core/supervisor_load.py
+# =========================================
+"""
+عدادات حمل المشرف (SupervisorLoad):
+- refresh_supervisor_loads(ids): يعيد حساب مشرفين معينين (query واحدة مجمعة) ويعمل upsert
+- with_load(qs, sf): يضيف ma_count/phd_count/researchers_total/assistants_count للـ queryset
+  بـ LEFT JOIN واحد على (supervisor, bucket) بدل Count على الروابط
+"""
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, FilteredRelation, Q, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Research, ResearchSupervision, SupervisorLoad
+
+
+COUNTERS = ("ma_count", "phd_count", "researchers_total", "assistants_count")
+
+_CLOSED = [Research.Status.DISCUSSED, Research.Status.DISMISSED, Research.Status.CANCELLED]
+
+# نفس تعريفات sf في exporters._status_filter_q (على research__status)
+BUCKET_FILTERS = {
+    SupervisorLoad.Bucket.ACTIVE: ~Q(research__status__in=_CLOSED),
+    SupervisorLoad.Bucket.DISCUSSED: Q(research__status=Research.Status.DISCUSSED),
+    SupervisorLoad.Bucket.ACTIVE_DISCUSSED: ~Q(research__status__in=[Research.Status.DISMISSED, Research.Status.CANCELLED]),
+    SupervisorLoad.Bucket.DISMISSED: Q(research__status=Research.Status.DISMISSED),
+    SupervisorLoad.Bucket.ALL: Q(),
+}
+
+
+def bucket_for(sf: Optional[str]) -> str:
+    sf = (sf or "active").strip().lower()
+    return sf if sf in SupervisorLoad.Bucket.values else SupervisorLoad.Bucket.ACTIVE
+
+
+def _aggregates():
+    researcher = Q(research__researcher_type=Research.ResearcherType.RESEARCHER)
+    assistant = Q(research__researcher_type=Research.ResearcherType.ASSISTANT)
+    out = {}
+    # (research, supervisor) unique -> Count من غير distinct
+    for bucket, status_q in BUCKET_FILTERS.items():
+        out[f"{bucket}_ma_count"] = Count("id", filter=researcher & Q(research__degree=Research.Degree.MA) & status_q)
+        out[f"{bucket}_phd_count"] = Count("id", filter=researcher & Q(research__degree=Research.Degree.PHD) & status_q)
+        out[f"{bucket}_researchers_total"] = Count("id", filter=researcher & status_q)
+        out[f"{bucket}_assistants_count"] = Count("id", filter=assistant & status_q)
+    return out
+
+
+def refresh_supervisor_loads(supervisor_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    يعيد حساب عدادات المشرفين دول (أو الكل لو None) ويرجّع عدد المشرفين اللي ليهم روابط.
+    المشرف اللي ملوش روابط خالص بتتشال صفوفه (والقراءة بتعتبره 0).
+    """
+    links = ResearchSupervision.objects.all()
+    if supervisor_ids is not None:
+        supervisor_ids = {int(i) for i in supervisor_ids if i is not None}
+        if not supervisor_ids:
+            return 0
+        links = links.filter(supervisor_id__in=supervisor_ids)
+
+    rows = links.values("supervisor_id").annotate(**_aggregates()).order_by()
+
+    objs = []
+    seen = set()
+    for row in rows:
+        seen.add(row["supervisor_id"])
+        for bucket in BUCKET_FILTERS:
+            objs.append(SupervisorLoad(
+                supervisor_id=row["supervisor_id"],
+                bucket=bucket,
+                **{name: row[f"{bucket}_{name}"] for name in COUNTERS},
+            ))
+
+    with transaction.atomic():
+        stale = SupervisorLoad.objects.all()
+        if supervisor_ids is not None:
+            stale = stale.filter(supervisor_id__in=supervisor_ids)
+        stale.exclude(supervisor_id__in=seen).delete()
+
+        SupervisorLoad.objects.bulk_create(
+            objs,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["supervisor", "bucket"],
+            update_fields=list(COUNTERS),
+        )
+    return len(seen)
+
+
+def with_load(supervisors, sf: Optional[str] = "active"):
+    """الـ queryset + عدادات الـ bucket المطلوب (0 لو المشرف ملوش صف)."""
+    bucket = bucket_for(sf)
+    return supervisors.annotate(
+        load=FilteredRelation("loads", condition=Q(loads__bucket=bucket)),
+    ).annotate(
+        **{name: Coalesce(f"load__{name}", Value(0)) for name in COUNTERS},
+    )
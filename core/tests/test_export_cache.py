@@ -0,0 +1,107 @@
+# =========================================
+# file: core/tests/test_export_cache.py
+# =========================================
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from openpyxl import Workbook
+
+from core import export_cache, export_pack
+from core.data_version import bump_data_version
+from core.models import Research
+
+
+class ExportCacheTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(EXPORT_CACHE_DIR=self.dir)
+        self.settings_override.enable()
+        export_cache._cleaned_version = -1
+        self.builds = 0
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def build(self):
+        self.builds += 1
+        wb = Workbook()
+        wb.active.append(["x"])
+        return wb
+
+    def files(self):
+        return sorted(p.name for p in Path(self.dir).glob("*.xlsx"))
+
+    def test_same_key_is_built_once(self):
+        first = export_cache.get_or_build("export", {"sf": "all"}, self.build)
+        second = export_cache.get_or_build("export", {"sf": "all"}, self.build)
+        self.assertEqual(first, second)
+        self.assertEqual(self.builds, 1)
+
+    def test_old_versions_are_dropped_once_per_version(self):
+        export_cache.get_or_build("export", {"sf": "all"}, self.build)
+        export_cache.get_or_build("department", {"dept_id": 1, "sf": "all"}, self.build)
+        self.assertEqual(len(self.files()), 2)
+
+        bump_data_version()
+        with mock.patch.object(Path, "glob", wraps=Path(self.dir).glob) as glob:
+            export_cache.get_or_build("export", {"sf": "all"}, self.build)
+            export_cache.get_or_build("export", {"sf": "active"}, self.build)
+        self.assertEqual(glob.call_count, 1)
+        self.assertEqual(len(self.files()), 2)
+        self.assertTrue(all(f"-v{export_cache.get_data_version()}-" in name for name in self.files()))
+
+    def test_free_text_search_is_not_cached(self):
+        User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.login(username="admin", password="x")
+        Research.objects.create(researcher_name="أحمد محمد", title="أثر التدريب", degree=Research.Degree.MA)
+
+        response = self.client.get("/export.xlsx", {"q": "احمد", "sf": "all"})
+        self.assertEqual(response.status_code, 200)
+        b"".join(response.streaming_content)
+        self.assertEqual(self.files(), [])
+
+        response = self.client.get("/export.xlsx", {"sf": "nonsense"})
+        b"".join(response.streaming_content)
+        self.client.get("/export.xlsx", {"sf": "active"})
+        self.assertEqual(len(self.files()), 1)
+
+
+class ExportPackTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(EXPORT_CACHE_DIR=self.dir)
+        self.settings_override.enable()
+        export_cache._cleaned_version = -1
+        User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.login(username="admin", password="x")
+        Research.objects.create(researcher_name="أحمد محمد", title="أثر التدريب", degree=Research.Degree.MA)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_missing_pack_is_built_out_of_band(self):
+        with mock.patch("core.views_frontend.start_pack_build") as start, \
+                mock.patch("django.db.connections.close_all") as close_all:
+            response = self.client.get("/export-pack.zip", {"sf": "nonsense"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "frontend/export_pack_wait.html")
+        start.assert_called_once_with("active")
+        close_all.assert_not_called()
+
+    def test_cached_pack_is_served(self):
+        path = export_pack.build_cached_pack("active")
+        with mock.patch("core.views_frontend.start_pack_build") as start:
+            response = self.client.get("/export-pack.zip", {"sf": "active"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertEqual(b"".join(response.streaming_content), Path(path).read_bytes())
+        start.assert_not_called()
+
+        bump_data_version()
+        self.assertEqual(export_pack.cached_pack("active"), (None, False))
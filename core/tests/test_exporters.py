@@ -0,0 +1,89 @@
+# =========================================
+# file: core/tests/test_exporters.py
+# =========================================
+import io
+
+from django.db import connection
+from openpyxl import Workbook, load_workbook
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.exporters import SheetWriter, build_department_workbook, build_export_workbook, iter_research_export_rows
+from core.models import Department, Research, ResearchSupervision, Supervisor
+
+
+class ExportQueryCountTests(TestCase):
+    """عدد الـ queries في التصدير ثابت مهما زاد عدد الأبحاث (مفيش query لكل صف)."""
+
+    def setUp(self):
+        self.dept = Department.objects.create(name="التدريب الرياضي")
+        self.other_dept = Department.objects.create(name="علوم الصحة")
+
+    def add_researches(self, n: int):
+        start = Research.objects.count()
+        for i in range(start, start + n):
+            research = Research.objects.create(
+                researcher_name=f"باحث {i}",
+                title=f"عنوان البحث رقم {i}",
+                degree=Research.Degree.PHD if i % 2 else Research.Degree.MA,
+                researcher_type=Research.ResearcherType.ASSISTANT if i % 5 == 0 else Research.ResearcherType.RESEARCHER,
+            )
+            for j, dept in enumerate((self.dept, self.other_dept)):
+                supervisor = Supervisor.objects.create(name=f"مشرف {i}-{j}", department=dept)
+                ResearchSupervision.objects.create(research=research, supervisor=supervisor)
+
+    def count_queries(self, fn) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            fn()
+        return len(ctx.captured_queries)
+
+    @staticmethod
+    def save(wb):
+        # write-only workbook لازم يتحفظ (بيقفل ملفات الشيتات المؤقتة)
+        wb.save(io.BytesIO())
+
+    def test_research_rows_use_two_queries(self):
+        self.add_researches(10)
+        with self.assertNumQueries(2):
+            rows = list(iter_research_export_rows(Research.objects.all()))
+
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0][0], Research.objects.order_by("id").first().id)
+        self.assertEqual(rows[0][6], "مشرف 0-0 | مشرف 0-1")
+        self.assertEqual(rows[0][7], "التدريب الرياضي | علوم الصحة")
+
+    def test_export_workbook_queries_do_not_grow(self):
+        self.add_researches(3)
+        small = self.count_queries(lambda: self.save(build_export_workbook(sf="all")))
+
+        self.add_researches(40)
+        with self.assertNumQueries(small):
+            self.save(build_export_workbook(sf="all"))
+
+    def test_department_workbook_queries_do_not_grow(self):
+        self.add_researches(3)
+        small = self.count_queries(lambda: self.save(build_department_workbook(self.dept, sf="all")))
+
+        self.add_researches(40)
+        with self.assertNumQueries(small):
+            self.save(build_department_workbook(self.dept, sf="all"))
+
+
+class SheetWriterTests(TestCase):
+    def test_widths_fit_the_longest_value_anywhere_in_the_sheet(self):
+        wb = Workbook(write_only=True)
+        writer = SheetWriter(wb, "Researches", ["ID", "العنوان"], max_width=60)
+        for i in range(1000):
+            writer.append([i, "عنوان قصير"])
+        writer.append([1000, "ع" * 40])
+        writer.close()
+
+        out = io.BytesIO()
+        wb.save(out)
+        ws = load_workbook(io.BytesIO(out.getvalue())).active
+
+        self.assertEqual(ws.column_dimensions["B"].width, 42)
+        self.assertEqual(ws.max_row, 1002)
+        self.assertEqual(ws["B1002"].value, "ع" * 40)
+        self.assertEqual(ws.auto_filter.ref, "A1:B1002")
+        self.assertEqual(ws.freeze_panes, "A2")
@@ -0,0 +1,42 @@
+# =========================================
+# file: core/tests/test_fees.py
+# =========================================
+from unittest import mock
+
+from django.test import TestCase
+
+from core import fees
+from core.models import Research, ResearchFeePayment
+
+
+class ProvisionFeeYearTests(TestCase):
+    def setUp(self):
+        self.researches = [
+            Research.objects.create(researcher_name=f"باحث {i}", title=f"عنوان {i}", degree=Research.Degree.MA)
+            for i in range(5)
+        ]
+        Research.objects.create(
+            researcher_name="باحث ناقش", title="عنوان", degree=Research.Degree.MA, status=Research.Status.DISCUSSED,
+        )
+
+    def test_creates_missing_rows_once(self):
+        ResearchFeePayment.objects.create(research=self.researches[0], year=2030, is_paid=True)
+
+        self.assertEqual(fees.provision_fee_year(2030, batch_size=2), 4)
+        self.assertEqual(fees.provision_fee_year(2030, batch_size=2), 0)
+        self.assertEqual(ResearchFeePayment.objects.filter(year=2030).count(), 5)
+        self.assertTrue(ResearchFeePayment.objects.get(research=self.researches[0], year=2030).is_paid)
+
+    def test_conflicting_rows_are_not_counted(self):
+        # صف اتعمل بين قراءة الناقصين والـ INSERT (toggle في نفس الوقت) بيتجاهل ومش بيتحسب
+        insert = fees._insert_fee_rows
+
+        def insert_after_toggle(year, research_ids):
+            ResearchFeePayment.objects.create(research_id=research_ids[0], year=year, is_paid=True)
+            return insert(year, research_ids)
+
+        with mock.patch.object(fees, "_insert_fee_rows", insert_after_toggle):
+            created = fees.provision_fee_year(2030, batch_size=2)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(ResearchFeePayment.objects.filter(year=2030).count(), 5)
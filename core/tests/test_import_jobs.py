@@ -0,0 +1,226 @@
+# =========================================
+# file: core/tests/test_import_jobs.py
+# =========================================
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from core.import_jobs import active_import_job, job_progress, run_import_job
+from core.importers import DEFAULT_COLUMNS, IMPORT_LOCK_NAME, import_lock, import_lock_holder
+from core.models import ImportJob, ImportLock, ImportRowFingerprint, Research, ResearchSupervision, Supervisor
+
+
+HEADER = [
+    DEFAULT_COLUMNS[k]
+    for k in ("col_name", "col_title", "col_degree", "col_type", "col_supervisor", "col_supervisor_dept", "col_status")
+]
+
+ROWS = [
+    ["أحمد محمد", "أثر التدريب على السرعة", "ماجستير", "باحث", "د. علي حسن، د. سامي فؤاد", "التدريب", "مسجل"],
+    ["منى علي", "تحليل مهارات السباحة", "دكتوراه", "باحث", "د. علي حسن", "التدريب", "تمت المناقشة"],
+    ["خالد سعيد", "برنامج تأهيلي للركبة", "ماجستير", "معيد", "د. هبة كمال", "الصحة", ""],
+]
+
+
+def xlsx_bytes(rows) -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in rows:
+        ws.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+# ✅ TransactionTestCase: الـ job بيقفل الـ connections في الآخر وبيكتب خارج transaction الـ test
+class ImportJobTests(TransactionTestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def make_job(self, rows=ROWS, content=None, **fields) -> ImportJob:
+        job = ImportJob(original_name="test.xlsx", **fields)
+        job.file.save("test.xlsx", ContentFile(content if content is not None else xlsx_bytes(rows)), save=False)
+        job.save()
+        return job
+
+    def test_load_feed_and_flush(self):
+        job = self.make_job()
+        run_import_job(job.pk)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, ImportJob.Status.DONE, job.error)
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.created_research, 3)
+        self.assertEqual(job.created_supervisors, 3)
+        self.assertEqual(job.created_links, 4)
+
+        self.assertEqual(Research.objects.count(), 3)
+        self.assertEqual(Supervisor.objects.count(), 3)
+        self.assertEqual(ResearchSupervision.objects.count(), 4)
+        self.assertEqual(ImportRowFingerprint.objects.count(), 3)
+        self.assertEqual(
+            Research.objects.get(researcher_name="منى علي").status, Research.Status.DISCUSSED
+        )
+
+    def test_progress_reaches_total(self):
+        job = self.make_job()
+        run_import_job(job.pk)
+        progress = job_progress(ImportJob.objects.get(pk=job.pk))
+
+        self.assertTrue(progress["done"])
+        self.assertEqual(progress["rows_total"], 3)
+        self.assertEqual(progress["rows_processed"], 3)
+        self.assertEqual(progress["rows_unchanged"], 0)
+        self.assertEqual(progress["error"], "")
+
+    def test_unchanged_rows_are_skipped_unless_full(self):
+        run_import_job(self.make_job().pk)
+
+        again = self.make_job()
+        run_import_job(again.pk)
+        again.refresh_from_db()
+        self.assertEqual(again.status, ImportJob.Status.DONE, again.error)
+        self.assertEqual((again.rows_total, again.rows_unchanged), (0, 3))
+
+        full = self.make_job(full=True)
+        run_import_job(full.pk)
+        full.refresh_from_db()
+        self.assertEqual(full.status, ImportJob.Status.DONE, full.error)
+        self.assertEqual((full.rows_total, full.rows_unchanged, full.rows_processed), (3, 0, 3))
+        self.assertEqual(full.created_research, 0)
+        self.assertEqual(Research.objects.count(), 3)
+
+    def test_reimport_restores_deleted_research(self):
+        run_import_job(self.make_job().pk)
+        Research.objects.get(researcher_name="منى علي").delete()
+
+        again = self.make_job()
+        run_import_job(again.pk)
+        again.refresh_from_db()
+
+        self.assertEqual(again.status, ImportJob.Status.DONE, again.error)
+        self.assertEqual((again.rows_total, again.rows_unchanged, again.created_research), (1, 2, 1))
+        self.assertTrue(Research.objects.filter(researcher_name="منى علي").exists())
+        self.assertEqual(ResearchSupervision.objects.count(), 4)
+
+    def test_failure_is_recorded(self):
+        job = self.make_job(content=b"not an excel file")
+        run_import_job(job.pk)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertTrue(job_progress(job)["done"])
+        self.assertEqual(Research.objects.count(), 0)
+
+    def test_flush_failure_rolls_back(self):
+        job = self.make_job()
+        with mock.patch("core.import_jobs.record_fingerprints", side_effect=RuntimeError("boom")):
+            run_import_job(job.pk)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertTrue(job.error.startswith("boom"))
+        self.assertEqual(Research.objects.count(), 0)
+        self.assertEqual(ResearchSupervision.objects.count(), 0)
+
+    def test_refuses_while_import_lock_is_held(self):
+        job = self.make_job()
+        with import_lock("import_supervisions other.xlsx"):
+            run_import_job(job.pk)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIn("import_supervisions other.xlsx", job.error)
+        self.assertEqual(Research.objects.count(), 0)
+
+    def test_lock_is_released_after_success_and_failure(self):
+        run_import_job(self.make_job().pk)
+        self.assertEqual(import_lock_holder(), "")
+
+        run_import_job(self.make_job(content=b"not an excel file").pk)
+        self.assertEqual(import_lock_holder(), "")
+
+    def test_stale_lock_does_not_block(self):
+        ImportLock.objects.create(
+            name=IMPORT_LOCK_NAME, holder="job #1 dead", acquired_at=timezone.now() - timedelta(days=1),
+        )
+        self.make_job(status=ImportJob.Status.RUNNING, started_at=timezone.now() - timedelta(days=1))
+        job = self.make_job()
+        self.assertEqual(active_import_job(exclude_id=job.pk), None)
+
+        run_import_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.DONE, job.error)
+
+    def test_cli_import_takes_the_same_lock(self):
+        path = os.path.join(self.media, "cli.xlsx")
+        with open(path, "wb") as f:
+            f.write(xlsx_bytes(ROWS))
+
+        with import_lock("job #99 web.xlsx"):
+            with self.assertRaisesMessage(CommandError, "job #99 web.xlsx"):
+                call_command("import_supervisions", path, stdout=io.StringIO())
+        self.assertEqual(Research.objects.count(), 0)
+
+        call_command("import_supervisions", path, stdout=io.StringIO())
+        self.assertEqual(Research.objects.count(), 3)
+        self.assertEqual(import_lock_holder(), "")
+
+    def test_upload_view_refuses_while_job_active(self):
+        User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.login(username="admin", password="x")
+        running = self.make_job(status=ImportJob.Status.RUNNING, started_at=timezone.now())
+
+        upload = ContentFile(xlsx_bytes(ROWS), name="new.xlsx")
+        with mock.patch("core.views_frontend.start_import_job") as start:
+            response = self.client.post(reverse("upload_researchers"), {"file": upload, "full": "1"})
+
+        self.assertRedirects(response, f"{reverse('upload_researchers')}?job={running.pk}", fetch_redirect_response=False)
+        start.assert_not_called()
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    def test_upload_view_refuses_while_cli_import_runs(self):
+        User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.login(username="admin", password="x")
+
+        upload = ContentFile(xlsx_bytes(ROWS), name="new.xlsx")
+        with import_lock("import_supervisions big.xlsx"), mock.patch("core.views_frontend.start_import_job") as start:
+            response = self.client.post(reverse("upload_researchers"), {"file": upload})
+
+        self.assertRedirects(response, reverse("upload_researchers"), fetch_redirect_response=False)
+        start.assert_not_called()
+        self.assertEqual(ImportJob.objects.count(), 0)
+
+    def test_upload_view_passes_full_flag(self):
+        User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.login(username="admin", password="x")
+
+        upload = ContentFile(xlsx_bytes(ROWS), name="new.xlsx")
+        with mock.patch("core.views_frontend.start_import_job") as start:
+            self.client.post(reverse("upload_researchers"), {"file": upload, "full": "1"})
+
+        job = ImportJob.objects.get()
+        self.assertTrue(job.full)
+        start.assert_called_once_with(job)
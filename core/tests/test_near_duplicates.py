@@ -0,0 +1,35 @@
+# =========================================
+# file: core/tests/test_near_duplicates.py
+# =========================================
+from django.test import TestCase
+
+from core.models import Research, ResearchNearDuplicate
+from core.near_duplicates import flag_near_duplicates
+
+
+class FlagNearDuplicatesTests(TestCase):
+    def setUp(self):
+        self.a = Research.objects.create(
+            researcher_name="أحمد محمد", title="أثر برنامج تدريبي مقترح على تحسين مستوى الأداء المهاري لناشئي كرة القدم",
+            degree=Research.Degree.MA,
+        )
+        self.b = Research.objects.create(
+            researcher_name="محمود علي", title="اثر برنامج تدريبي مقترح علي تحسين مستوي الاداء المهاري لناشئي كرة القدم.",
+            degree=Research.Degree.MA,
+        )
+
+    def pairs(self):
+        return set(ResearchNearDuplicate.objects.values_list("research_id", "other_id"))
+
+    def test_title_edit_removes_flag(self):
+        self.assertEqual(self.pairs(), {(self.a.id, self.b.id)})
+
+        self.b.title = "دراسة تحليلية لإصابات الملاعب لدى لاعبي الكرة الطائرة"
+        self.b.save()
+        self.assertEqual(self.pairs(), set())
+
+    def test_reflag_after_import_update_drops_stale_pairs(self):
+        # الاستيراد بيحدّث العنوان bulk (من غير signals) وبعدين يعيد التسجيل
+        Research.objects.filter(id=self.a.id).update(title="دراسة تحليلية لإصابات الملاعب لدى لاعبي الكرة الطائرة")
+        self.assertEqual(flag_near_duplicates([self.a.id]), 0)
+        self.assertEqual(self.pairs(), set())
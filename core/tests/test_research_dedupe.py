@@ -0,0 +1,95 @@
+# =========================================
+# file: core/tests/test_research_dedupe.py
+# =========================================
+import hashlib
+from unittest import mock
+
+from django.test import TestCase
+
+from core.data_version import get_data_version
+from core.models import (
+    Department,
+    Research,
+    ResearchDepartmentScope,
+    ResearchFeePayment,
+    ResearchSupervision,
+    Supervisor,
+    SupervisorLoad,
+)
+from core.research_dedupe import dedupe_researches, iter_duplicate_groups, merge_groups
+
+
+class MergeGroupsTests(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="التدريب")
+        self.other_dept = Department.objects.create(name="الصحة")
+        self.shared = Supervisor.objects.create(name="د. علي حسن", department=self.dept)
+        self.only_dup = Supervisor.objects.create(name="د. هبة كمال", department=self.other_dept)
+
+        self.keep = Research.objects.create(researcher_name="أحمد محمد", title="أثر التدريب", degree=Research.Degree.MA)
+        self.dup = Research.objects.create(researcher_name="احمد محمد", title="اثر التدريب", degree=Research.Degree.MA)
+        ResearchSupervision.objects.create(research=self.keep, supervisor=self.shared)
+        ResearchSupervision.objects.create(research=self.dup, supervisor=self.shared)
+        ResearchSupervision.objects.create(research=self.dup, supervisor=self.only_dup)
+        ResearchFeePayment.objects.create(research=self.dup, year=2024, is_paid=True)
+
+    def load(self, supervisor):
+        return SupervisorLoad.objects.get(supervisor=supervisor, bucket=SupervisorLoad.Bucket.ALL).researchers_total
+
+    def test_merge_moves_links_and_refreshes_denormalized_rows(self):
+        version = get_data_version()
+        result = merge_groups([(self.keep.id, [self.dup.id])])
+
+        self.assertEqual(result, {"groups": 1, "deleted": 1, "links_moved": 1, "fees_moved": 1})
+        self.assertFalse(Research.objects.filter(id=self.dup.id).exists())
+        self.assertEqual(
+            set(ResearchSupervision.objects.values_list("research_id", "supervisor_id")),
+            {(self.keep.id, self.shared.id), (self.keep.id, self.only_dup.id)},
+        )
+        self.assertTrue(ResearchFeePayment.objects.get(research=self.keep, year=2024).is_paid)
+
+        self.assertEqual(self.load(self.shared), 1)
+        self.assertEqual(self.load(self.only_dup), 1)
+        self.assertEqual(
+            set(ResearchDepartmentScope.objects.values_list("research_id", "department_id")),
+            {(self.keep.id, self.dept.id), (self.keep.id, self.other_dept.id)},
+        )
+        self.assertGreater(get_data_version(), version)
+
+    def test_merge_does_not_run_per_row_signals(self):
+        with mock.patch("core.signals.bump_data_version") as bump, \
+                mock.patch("core.signals.refresh_supervisor_loads") as loads, \
+                mock.patch("core.signals.refresh_research_scopes") as scopes:
+            merge_groups([(self.keep.id, [self.dup.id])])
+        bump.assert_not_called()
+        loads.assert_not_called()
+        scopes.assert_not_called()
+
+
+class DuplicateGroupsTests(TestCase):
+    def make(self, name, title, degree=Research.Degree.MA, **extra):
+        return Research.objects.create(researcher_name=name, title=title, degree=degree, **extra)
+
+    def test_groups_rows_the_unique_key_lets_through(self):
+        dept = Department.objects.create(name="التدريب")
+        # اسم بمسافة زيادة + عنوان بمسافتين: title_hash واحد بس الاسم المخزن مختلف
+        keep = self.make("سارة علي", "أثر التدريب", department=dept)
+        spaced = self.make("سارة علي ", "أثر  التدريب")
+        # title_hash قديم (strip بس) من قبل الـ canonicalization
+        legacy = self.make("سارة علي", "مؤقت")
+        Research.objects.filter(id=legacy.id).update(
+            title=" أثر\nالتدريب", title_hash=hashlib.sha256("أثر\nالتدريب".encode()).hexdigest()
+        )
+
+        # مش مكرر: عنوان تاني / مرحلة تانية / عنوان فاضي
+        self.make("سارة علي", "أثر الإحماء")
+        self.make("سارة علي", "أثر التدريب", degree=Research.Degree.PHD)
+        self.make("منى حسن", "")
+        self.make("منى حسن ", "")
+
+        self.assertEqual(list(iter_duplicate_groups()), [(keep.id, [spaced.id, legacy.id])])
+
+        result = dedupe_researches()
+        self.assertEqual((result["groups"], result["deleted"]), (1, 2))
+        self.assertEqual(list(iter_duplicate_groups()), [])
+        self.assertEqual(Research.objects.count(), 5)
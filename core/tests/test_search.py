@@ -0,0 +1,31 @@
+# =========================================
+# file: core/tests/test_search.py
+# =========================================
+from django.test import TestCase
+
+from core.models import Research, Supervisor
+from core.search import search_researches, search_supervisors
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.match = Research.objects.create(
+            researcher_name="أحمد محمد", title="تأثير التدريب - دراسة مقارنة", degree=Research.Degree.MA,
+        )
+        self.other = Research.objects.create(
+            researcher_name="منى علي", title="تحليل مهارات السباحة", degree=Research.Degree.PHD,
+        )
+        self.supervisor = Supervisor.objects.create(name="د. علي حسن / أستاذ")
+        Supervisor.objects.create(name="د. هبة كمال")
+
+    def test_tokens_match_word_prefixes(self):
+        found = search_researches(Research.objects.all(), "احمد التدري")
+        self.assertEqual(list(found), [self.match])
+
+    def test_symbols_only_fall_back_to_icontains(self):
+        self.assertEqual(list(search_researches(Research.objects.all(), " - ")), [self.match])
+        self.assertEqual(list(search_supervisors(Supervisor.objects.all(), "/")), [self.supervisor])
+
+    def test_empty_query_keeps_queryset(self):
+        self.assertEqual(search_researches(Research.objects.all(), "").count(), 2)
+        self.assertEqual(search_supervisors(Supervisor.objects.all(), "  ").count(), 2)
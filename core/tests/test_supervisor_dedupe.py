@@ -0,0 +1,36 @@
+# =========================================
+# file: core/tests/test_supervisor_dedupe.py
+# =========================================
+from django.test import TestCase
+
+from core.models import Supervisor
+from core.supervisor_dedupe import find_duplicate_groups, plan_to_json
+
+
+class SupervisorDedupeTests(TestCase):
+    def plan(self):
+        return plan_to_json(find_duplicate_groups())
+
+    def test_exact_canonical_group_is_approved(self):
+        keep = Supervisor.objects.create(name="د. محمد احمد علي")
+        dup = Supervisor.objects.create(name="أ.د. محمد أحمد علي")
+
+        [group] = self.plan()
+        self.assertTrue(group["approved"])
+        self.assertEqual(group["keep"]["id"], keep.id)
+        self.assertEqual([(m["id"], m["score"]) for m in group["merge"]], [(dup.id, 1.0)])
+
+    def test_fuzzy_link_inside_group_needs_review(self):
+        # A==B و C==D، و B~C (الاسم الرباعي) بيجمعهم في جروب واحد
+        keep = Supervisor.objects.create(name="د. محمد احمد علي")
+        same = Supervisor.objects.create(name="محمد أحمد علي")
+        longer = Supervisor.objects.create(name="محمد احمد علي حسن")
+        longer_same = Supervisor.objects.create(name="أ.د. محمد احمد علي حسن")
+
+        [group] = self.plan()
+        self.assertFalse(group["approved"])
+        self.assertEqual(group["keep"]["id"], keep.id)
+        scores = {m["id"]: m["score"] for m in group["merge"]}
+        self.assertEqual(scores[same.id], 1.0)
+        self.assertLess(scores[longer.id], 1.0)
+        self.assertLess(scores[longer_same.id], 1.0)
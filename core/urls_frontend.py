@@ -43,12 +43,19 @@ urlpatterns = [
     # Department Stats
     path("department-stats/", views_frontend.department_stats, name="department_stats"),
     path("export-department.xlsx", views_frontend.export_department_excel, name="export_department_excel"),
+    path("export-department.csv", views_frontend.export_department_stream, {"fmt": "csv"}, name="export_department_csv"),
+    path("export-department.ndjson", views_frontend.export_department_stream, {"fmt": "ndjson"}, name="export_department_ndjson"),
 
     # Export + Upload
     path("export.xlsx", views_frontend.export_excel, name="export_excel"),
+    path("export.csv", views_frontend.export_stream, {"fmt": "csv"}, name="export_csv"),
+    path("export.ndjson", views_frontend.export_stream, {"fmt": "ndjson"}, name="export_ndjson"),
+    path("export-pack.zip", views_frontend.export_pack, name="export_pack"),
     path("upload_researchers/", views_frontend.upload_researchers, name="upload_researchers"),
+    path("upload_researchers/jobs/<int:job_id>/", views_frontend.import_job_status, name="import_job_status"),
 
     # Fees
+    path("fees/", views_frontend.fees_matrix, name="fees_matrix"),
     path("research/<int:research_id>/toggle-fees/<int:year>/", views_frontend.toggle_fees_status, name="toggle_fees_status"),
     path("research/<int:research_id>/add-fees-year/", views_frontend.add_fees_year, name="add_fees_year"),
     path("research/<int:research_id>/delete-fees-year/<int:year>/", views_frontend.delete_fees_year, name="delete_fees_year"),
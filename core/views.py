@@ -4,29 +4,18 @@
 # =========================================
 from collections import defaultdict
 
-from django.db.models import Count, Q
+from django.db.models import F
 from django.shortcuts import get_object_or_404, render
 
 from .models import Supervisor, ResearchSupervision, Research
+from .supervisor_load import with_load
 
 
 def supervisors_list(request):
+    # ✅ العدادات من SupervisorLoad (كل الحالات) بدل Count على الروابط
     supervisors = (
-        Supervisor.objects
-        .filter(is_active=True)
-        .select_related("department")
-        .annotate(
-            researchers_count=Count(
-                "researchsupervision__research",
-                filter=Q(researchsupervision__research__researcher_type=Research.ResearcherType.RESEARCHER),
-                distinct=True,
-            ),
-            assistants_count=Count(
-                "researchsupervision__research",
-                filter=Q(researchsupervision__research__researcher_type=Research.ResearcherType.ASSISTANT),
-                distinct=True,
-            ),
-        )
+        with_load(Supervisor.objects.filter(is_active=True).select_related("department"), "all")
+        .annotate(researchers_count=F("researchers_total"))
         .order_by("name")
     )
     return render(request, "supervisors_list.html", {"supervisors": supervisors})
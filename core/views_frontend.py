@@ -1,27 +1,47 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import re
 from datetime import datetime
 
-import openpyxl
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
-from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.db.models import Count, Prefetch, Q
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
 
-from core.exporters import build_export_workbook
+from core.data_version import get_data_version
+from core.export_cache import build_file_response, cached_file_response, get_or_build
+from core.export_pack import cached_pack, start_pack_build
+from core.export_stream import CSV_CONTENT_TYPE, NDJSON_CONTENT_TYPE, stream_csv, stream_ndjson
+from core.exporters import (
+    _status_filter_q,
+    build_department_workbook,
+    build_export_workbook,
+    department_researches_qs,
+    export_researches_qs,
+)
+from core.fees import FEE_FILTERS, fee_matrix, filter_by_fee_status
+from core.import_jobs import active_import_job, job_progress, start_import_job
+from core.importers import import_lock_holder
 from core.models import (
     Department,
     DepartmentUser,
+    ImportJob,
     Research,
     ResearchFeePayment,
     ResearchSupervision,
     Supervisor,
 )
+from core.pagination import keyset_page, parse_cursor, parse_page_size
+from core.search import search_researches, search_supervisors
+from core.stats import department_breakdown, department_dashboard, research_facets
+from core.supervisor_load import bucket_for, with_load
 
 # ============================================================
 # Helpers
@@ -49,13 +69,13 @@ def get_research_scope_qs(user):
     - Superuser: all Research
     - Department user: researches linked to supervisors of their department
       (NOT relying on Research.department)
+      -> join على ResearchDepartmentScope (صف واحد لكل بحث/قسم، من غير DISTINCT)
     """
     qs = Research.objects.all()
     dept = get_user_department(user)
     if not dept:
         return qs
-    dept_supers = Supervisor.objects.filter(department=dept, is_active=True)
-    return qs.filter(researchsupervision__supervisor__in=dept_supers).distinct()
+    return qs.filter(department_scopes__department=dept)
 
 
 def get_supervisor_scope_qs(user):
@@ -148,18 +168,14 @@ def home(request):
     # ✅ الإحصائيات العلوية حسب نطاق اليوزر
     qs_all = get_research_scope_qs(request.user)
 
-    ma_current = (
-        qs_all.filter(degree=Research.Degree.MA, researcher_type=Research.ResearcherType.RESEARCHER)
-        .exclude(status__in=excluded_statuses)
-        .count()
-    )
-    phd_current = (
-        qs_all.filter(degree=Research.Degree.PHD, researcher_type=Research.ResearcherType.RESEARCHER)
-        .exclude(status__in=excluded_statuses)
-        .count()
+    # ✅ الأربع أرقام في aggregate واحد
+    researcher = Q(researcher_type=Research.ResearcherType.RESEARCHER)
+    top = qs_all.aggregate(
+        ma_current=Count("id", filter=researcher & Q(degree=Research.Degree.MA) & ~Q(status__in=excluded_statuses), distinct=True),
+        phd_current=Count("id", filter=researcher & Q(degree=Research.Degree.PHD) & ~Q(status__in=excluded_statuses), distinct=True),
+        discussed_count=Count("id", filter=Q(status=Research.Status.DISCUSSED), distinct=True),
+        dismissed_count=Count("id", filter=Q(status=Research.Status.DISMISSED), distinct=True),
     )
-    discussed_count = qs_all.filter(status=Research.Status.DISCUSSED).count()
-    dismissed_count = qs_all.filter(status=Research.Status.DISMISSED).count()
 
     # ✅ الأقسام
     departments_with_supervisors = (
@@ -176,65 +192,25 @@ def home(request):
     selected_dept = None
     dept_stats = None
     dept_supervisors = []
+    chart_data = {"labels": [], "phd": [], "ma": [], "assistants": []}
 
     if dept_id:
         selected_dept = get_object_or_404(Department, id=int(dept_id))
 
-        dept_supervisors_qs = Supervisor.objects.filter(department=selected_dept, is_active=True)
-
-        base_researches = Research.objects.filter(
-            researchsupervision__supervisor__in=dept_supervisors_qs
-        ).distinct()
-
-        base_active = base_researches.exclude(status__in=excluded_statuses)
-
-        dept_stats = {
-            "total": base_active.filter(researcher_type=Research.ResearcherType.RESEARCHER).count(),
-            "phd": base_active.filter(degree=Research.Degree.PHD, researcher_type=Research.ResearcherType.RESEARCHER).count(),
-            "ma": base_active.filter(degree=Research.Degree.MA, researcher_type=Research.ResearcherType.RESEARCHER).count(),
-            "assistants": base_active.filter(researcher_type=Research.ResearcherType.ASSISTANT).count(),
-        }
-
-        for supervisor in dept_supervisors_qs:
-            supervisor_researches = base_active.filter(researchsupervision__supervisor=supervisor).distinct()
-
-            ma_count = supervisor_researches.filter(
-                degree=Research.Degree.MA, researcher_type=Research.ResearcherType.RESEARCHER
-            ).count()
-            phd_count = supervisor_researches.filter(
-                degree=Research.Degree.PHD, researcher_type=Research.ResearcherType.RESEARCHER
-            ).count()
-            assistants_count = supervisor_researches.filter(
-                researcher_type=Research.ResearcherType.ASSISTANT
-            ).count()
-            total_count = ma_count + phd_count
-
-            supervisor.ma_count = ma_count
-            supervisor.phd_count = phd_count
-            supervisor.assistants_count = assistants_count
-            supervisor.total_count = total_count
-
-            dept_supervisors.append(supervisor)
-
-        dept_supervisors = sorted(dept_supervisors, key=lambda x: x.total_count, reverse=True)
-
-    # Chart data
-    chart_data = {"labels": [], "phd": [], "ma": [], "assistants": []}
-    for supervisor in dept_supervisors:
-        short_name = " ".join((supervisor.name or "").split()[:2]) or (supervisor.name or "")
-        chart_data["labels"].append(short_name)
-        chart_data["phd"].append(getattr(supervisor, "phd_count", 0))
-        chart_data["ma"].append(getattr(supervisor, "ma_count", 0))
-        chart_data["assistants"].append(getattr(supervisor, "assistants_count", 0))
+        # ✅ المشرفين + إجماليات القسم + الرسم البياني من نفس البيانات (عدد queries ثابت)
+        dashboard = department_dashboard(selected_dept)
+        dept_stats = dashboard["stats"]
+        dept_supervisors = dashboard["supervisors"]
+        chart_data = dashboard["chart_data"]
 
     return render(
         request,
         "frontend/home.html",
         {
-            "ma_current": ma_current,
-            "phd_current": phd_current,
-            "discussed_count": discussed_count,
-            "dismissed_count": dismissed_count,
+            "ma_current": top["ma_current"],
+            "phd_current": top["phd_current"],
+            "discussed_count": top["discussed_count"],
+            "dismissed_count": top["dismissed_count"],
             "departments": departments,
             "selected_dept": selected_dept,
             "selected_dept_id": selected_dept.id if selected_dept else None,
@@ -247,8 +223,44 @@ def home(request):
     )
 
 
+HOME_STAT_TITLES = {
+    "ma_current": "ماجستير (الحاليين)",
+    "phd_current": "دكتوراه (الحاليين)",
+    "discussed": "ناقشوا",
+    "dismissed": "مفصولين",
+}
+HOME_STAT_FIELDS = ("id", "name", "degree", "supervisors", "status")
+
+
 @login_required
 def home_stat_details(request, stat_type):
+    """
+    JSON للمودال في الرئيسية:
+    - ?after=<id> صفحات بالـ id (keyset) و ?limit= (لحد 500) - "next" = الـ cursor التالي
+    - ?fields=id,name,degree,supervisors,status (الافتراضي: الكل)
+    - ETag من إصدار الداتا: نفس الطلب من غير تعديلات = 304 من غير ما نلمس الأبحاث
+    """
+    if stat_type not in HOME_STAT_TITLES:
+        return JsonResponse({"error": "Invalid stat type"}, status=400)
+
+    fields = [f for f in (request.GET.get("fields") or "").split(",") if f in HOME_STAT_FIELDS] or list(HOME_STAT_FIELDS)
+    page_size = parse_page_size(request.GET.get("limit"), 100)
+
+    dept = get_user_department(request.user)
+    etag_source = "|".join([
+        str(get_data_version()),
+        str(dept.id if dept else "all"),
+        stat_type,
+        str(parse_cursor(request.GET.get("after")) or ""),
+        str(page_size),
+        ",".join(fields),
+    ])
+    etag = '"%s"' % hashlib.md5(etag_source.encode("utf-8")).hexdigest()
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
     excluded_statuses = [
         Research.Status.DISCUSSED,
         Research.Status.DISMISSED,
@@ -256,42 +268,44 @@ def home_stat_details(request, stat_type):
     ]
 
     qs_api = get_research_scope_qs(request.user)
+    title = HOME_STAT_TITLES[stat_type]
 
     if stat_type == "ma_current":
         researches = qs_api.filter(
             degree=Research.Degree.MA, researcher_type=Research.ResearcherType.RESEARCHER
         ).exclude(status__in=excluded_statuses)
-        title = "ماجستير (الحاليين)"
     elif stat_type == "phd_current":
         researches = qs_api.filter(
             degree=Research.Degree.PHD, researcher_type=Research.ResearcherType.RESEARCHER
         ).exclude(status__in=excluded_statuses)
-        title = "دكتوراه (الحاليين)"
     elif stat_type == "discussed":
         researches = qs_api.filter(status=Research.Status.DISCUSSED)
-        title = "ناقشوا"
-    elif stat_type == "dismissed":
-        researches = qs_api.filter(status=Research.Status.DISMISSED)
-        title = "مفصولين"
     else:
-        return JsonResponse({"error": "Invalid stat type"}, status=400)
+        researches = qs_api.filter(status=Research.Status.DISMISSED)
 
-    researches = researches.select_related("department").prefetch_related("researchsupervision_set__supervisor")[:200]
+    page = keyset_page(
+        researches.only("id", "researcher_name", "degree", "status")
+        .prefetch_related(*(["researchsupervision_set__supervisor"] if "supervisors" in fields else [])),
+        after=parse_cursor(request.GET.get("after")),
+        size=page_size,
+    )
 
     data = []
-    for r in researches:
-        supervisors = [f"د. {link.supervisor.name}" for link in r.researchsupervision_set.all()]
-        data.append(
-            {
-                "id": r.id,
-                "name": r.researcher_name,
-                "degree": r.get_degree_display(),
-                "supervisors": ", ".join(supervisors),
-                "status": r.get_status_display(),
-            }
-        )
+    for r in page.items:
+        item = {
+            "id": r.id,
+            "name": r.researcher_name,
+            "degree": r.get_degree_display(),
+            "status": r.get_status_display(),
+        }
+        if "supervisors" in fields:
+            item["supervisors"] = ", ".join(f"د. {link.supervisor.name}" for link in r.researchsupervision_set.all())
+        data.append({k: item[k] for k in fields})
 
-    return JsonResponse({"title": title, "count": len(data), "data": data})
+    response = JsonResponse({"title": title, "count": len(data), "next": page.next_after, "data": data})
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 # ✅ Alias عشان NoReverseMatch اللي ظهر عندك: home_department_stats
@@ -324,51 +338,11 @@ def supervisors_page(request):
     if dept_restriction:
         dept_id = str(dept_restriction.id)
 
-    excluded_for_active = [
-        Research.Status.DISCUSSED,
-        Research.Status.DISMISSED,
-        Research.Status.CANCELLED,
-    ]
-    status_q = ~Q(researches__status__in=excluded_for_active)
-
-    supervisors = (
-        get_supervisor_scope_qs(request.user)
-        .annotate(
-            ma_count=Count(
-                "researches",
-                filter=(
-                    Q(researches__researcher_type=Research.ResearcherType.RESEARCHER)
-                    & Q(researches__degree=Research.Degree.MA)
-                    & status_q
-                ),
-                distinct=True,
-            ),
-            phd_count=Count(
-                "researches",
-                filter=(
-                    Q(researches__researcher_type=Research.ResearcherType.RESEARCHER)
-                    & Q(researches__degree=Research.Degree.PHD)
-                    & status_q
-                ),
-                distinct=True,
-            ),
-            researchers_total=Count(
-                "researches",
-                filter=(Q(researches__researcher_type=Research.ResearcherType.RESEARCHER) & status_q),
-                distinct=True,
-            ),
-            assistants_count=Count(
-                "researches",
-                filter=(Q(researches__researcher_type=Research.ResearcherType.ASSISTANT) & status_q),
-                distinct=True,
-            ),
-            total_links=Count("researchsupervision", distinct=True),
-        )
-        .order_by("-researchers_total", "name")
-    )
+    # ✅ العدادات جاهزة في SupervisorLoad (الحاليين) بدل Count على الروابط
+    supervisors = with_load(get_supervisor_scope_qs(request.user), "active").order_by("-researchers_total", "name")
 
     if q:
-        supervisors = supervisors.filter(name__icontains=q)
+        supervisors = search_supervisors(supervisors, q)
 
     if dept_id:
         supervisors = supervisors.filter(department_id=int(dept_id))
@@ -476,6 +450,19 @@ def supervisor_detail(request, pk: int):
 # Researchers
 # ============================================================
 
+# أعمدة جدول الباحثين (الباقي بيتأجل: تواريخ/ملاحظات/...)
+RESEARCHERS_TABLE_FIELDS = (
+    "id",
+    "researcher_name",
+    "degree",
+    "researcher_type",
+    "title",
+    "status",
+    "phone",
+    "department__name",
+)
+
+
 @login_required
 def researchers_page(request):
     q = (request.GET.get("q") or "").strip()
@@ -503,24 +490,48 @@ def researchers_page(request):
 
     qs = get_research_scope_qs(request.user).filter(researcher_type=Research.ResearcherType.RESEARCHER)
 
-    researches = (
-        qs.filter(status_filter)
-        .prefetch_related("researchsupervision_set__supervisor", "department")
-        .order_by("-id")
-    )
+    researches = qs.filter(status_filter)
 
     if q:
-        researches = researches.filter(Q(researcher_name__icontains=q) | Q(title__icontains=q))
+        researches = search_researches(researches, q)
     if date_from:
         researches = researches.filter(registration_date__gte=date_from)
     if date_to:
         researches = researches.filter(registration_date__lte=date_to)
 
+    # ✅ الإجمالي + عدد كل حالة/مرحلة في query واحدة (بدل researches.count في القالب)
+    facets = research_facets(researches)
+
+    # ✅ صفحة واحدة بس (keyset بالـ id) + الأعمدة اللي الجدول بيعرضها
+    page_size = parse_page_size(request.GET.get("page_size"), settings.RESEARCHERS_PAGE_SIZE)
+    page = keyset_page(
+        researches.select_related("department")
+        .only(*RESEARCHERS_TABLE_FIELDS)
+        .prefetch_related(
+            "researchsupervision_set__supervisor",
+            Prefetch(
+                "fee_payments",
+                queryset=ResearchFeePayment.objects.filter(year=timezone.localdate().year),
+            ),
+        ),
+        after=parse_cursor(request.GET.get("after")),
+        before=parse_cursor(request.GET.get("before")),
+        size=page_size,
+    )
+
+    params = request.GET.copy()
+    params.pop("after", None)
+    params.pop("before", None)
+
     return render(
         request,
         "frontend/researchers.html",
         {
-            "researches": researches,
+            "researches": page.items,
+            "page": page,
+            "page_size": page_size,
+            "page_query": params.urlencode(),
+            "facets": facets,
             "q": q,
             "sf": sf,
             "date_from": date_from,
@@ -543,18 +554,82 @@ def research_detail(request, pk):
     supervisors = [link.supervisor for link in research.researchsupervision_set.all()]
     current_year = timezone.localdate().year
 
-    ResearchFeePayment.objects.get_or_create(research=research, year=current_year, defaults={"is_paid": False})
+    # ✅ الصفحة قراءة بس: صفوف السنة الجديدة بتتعمل مرة واحدة (rollover_fee_year / أكشن الأدمن)،
+    # ولو لسه ما اتعملتش السنة الحالية بتظهر "لم يدفع" من غير ما تتكتب (toggle بيعملها)
     payments = list(research.fee_payments.all())
+    if all(p.year != current_year for p in payments):
+        payments.append(ResearchFeePayment(research=research, year=current_year, is_paid=False))
+        payments.sort(key=lambda p: p.year, reverse=True)
+
+    # ✅ ETag من البيانات اللي الصفحة بتعرضها: نفس الحالة = 304 من غير render
+    etag_source = "|".join([
+        str(research.pk),
+        str(research.updated_at),
+        research.department.name if research.department else "",
+        ",".join(f"{s.pk}:{s.name}" for s in supervisors),
+        ",".join(f"{p.year}:{int(p.is_paid)}:{p.paid_at}" for p in payments),
+        str(request.user.is_superuser),
+    ])
+    etag = '"%s"' % hashlib.md5(etag_source.encode("utf-8")).hexdigest()
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        response = HttpResponseNotModified()
+    else:
+        response = render(
+            request,
+            "frontend/research_detail.html",
+            {
+                "research": research,
+                "supervisors": supervisors,
+                "payments": payments,
+                "current_year": current_year,
+                "is_admin": request.user.is_superuser,
+            },
+        )
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# ============================================================
+# Fees matrix (الباحثين × السنين)
+# ============================================================
+
+@login_required
+def fees_matrix(request):
+    q = (request.GET.get("q") or "").strip()
+    status_q, sf = _status_filter_q(request.GET.get("sf"))
+    current_year = timezone.localdate().year
+
+    year_raw = (request.GET.get("year") or "").strip()
+    year = int(year_raw) if year_raw.isdigit() else current_year
+    fee = (request.GET.get("fee") or "").strip().lower()
+    if fee not in FEE_FILTERS:
+        fee = ""
+
+    researches = (
+        get_research_scope_qs(request.user)
+        .filter(researcher_type=Research.ResearcherType.RESEARCHER)
+        .filter(status_q)
+    )
+    if q:
+        researches = search_researches(researches, q)
+    researches = filter_by_fee_status(researches, year, fee)
+
+    # ✅ query للباحثين + query واحدة للمصروفات (pivot في الذاكرة)
+    matrix = fee_matrix(researches, years=[current_year, year])
 
     return render(
         request,
-        "frontend/research_detail.html",
+        "frontend/fees_matrix.html",
         {
-            "research": research,
-            "supervisors": supervisors,
-            "payments": payments,
+            "matrix": matrix,
+            "q": q,
+            "sf": sf,
+            "year": year,
+            "fee": fee,
             "current_year": current_year,
             "is_admin": request.user.is_superuser,
+            "dept_restriction": get_user_department(request.user),
         },
     )
 
@@ -571,67 +646,18 @@ def department_stats(request):
     if dept_restriction:
         dept_id = str(dept_restriction.id)
 
-    sf = (request.GET.get("sf") or "active").strip().lower()
-    excluded_for_active = [
-        Research.Status.DISCUSSED,
-        Research.Status.DISMISSED,
-        Research.Status.CANCELLED,
-    ]
+    sf = bucket_for(request.GET.get("sf"))
 
-    if sf == "discussed":
-        status_filter = Q(status=Research.Status.DISCUSSED)
-    elif sf == "dismissed":
-        status_filter = Q(status=Research.Status.DISMISSED)
-    elif sf == "all":
-        status_filter = Q()
-    elif sf == "active_discussed":
-        status_filter = ~Q(status__in=[Research.Status.DISMISSED, Research.Status.CANCELLED])
-    else:
-        sf = "active"
-        status_filter = ~Q(status__in=excluded_for_active)
-
-    if dept_restriction:
-        departments_with_supervisors = [dept_restriction.id]
-    else:
-        departments_with_supervisors = (
-            Supervisor.objects.filter(is_active=True, department__isnull=False)
-            .values_list("department_id", flat=True)
-            .distinct()
-        )
-
-    all_departments = Department.objects.filter(id__in=departments_with_supervisors)
-
-    departments = []
-    for dept in all_departments:
-        dept_supervisors = Supervisor.objects.filter(department=dept, is_active=True)
-        dept_researches = (
-            Research.objects.filter(researchsupervision__supervisor__in=dept_supervisors)
-            .filter(status_filter)
-            .distinct()
-        )
-        total = dept_researches.count()
-        if total > 0:
-            dept.total = total
-            dept.phd = dept_researches.filter(degree=Research.Degree.PHD).count()
-            dept.ma = dept_researches.filter(degree=Research.Degree.MA).count()
-            dept.researchers = dept_researches.filter(researcher_type=Research.ResearcherType.RESEARCHER).count()
-            dept.assistants = dept_researches.filter(researcher_type=Research.ResearcherType.ASSISTANT).count()
-            departments.append(dept)
-
-    departments = sorted(departments, key=lambda x: x.total, reverse=True)
+    # ✅ كل الأقسام (قسم × مرحلة × نوع) في query واحدة
+    departments = department_breakdown(sf, department_id=dept_restriction.id if dept_restriction else None)
 
     selected_dept = None
     dept_researches = []
 
     if dept_id:
         selected_dept = get_object_or_404(Department, id=int(dept_id))
-        dept_supervisors = Supervisor.objects.filter(department=selected_dept, is_active=True)
-        dept_researches = (
-            Research.objects.filter(researchsupervision__supervisor__in=dept_supervisors)
-            .filter(status_filter)
-            .distinct()
-            .prefetch_related("researchsupervision_set__supervisor")
-        )
+        dept_researches, _ = department_researches_qs(selected_dept, sf)
+        dept_researches = dept_researches.prefetch_related("researchsupervision_set__supervisor")
 
     return render(
         request,
@@ -660,7 +686,13 @@ def export_excel(request):
     supervisor_id = request.GET.get("supervisor_id")
     sf = (request.GET.get("sf") or "active").strip().lower()
 
-    wb = build_export_workbook(q=q, supervisor_id=supervisor_id, sf=sf)
+    # ✅ نفس الفلاتر + نفس إصدار الداتا = نفس الملف (من الكاش)
+    # sf غير معروف = active (زي _status_filter_q) علشان المفتاح ما يتكررش بنصوص عشوائية
+    sf = bucket_for(sf)
+    supervisor_id = str(int(supervisor_id)) if supervisor_id else None
+
+    def build():
+        return build_export_workbook(q=q, supervisor_id=supervisor_id, sf=sf)
 
     sf_slug = {
         "active": "active",
@@ -685,10 +717,12 @@ def export_excel(request):
     else:
         filename_ascii = f"Supervisors__{sf_slug}__{date_part}.xlsx"
 
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="{filename_ascii}"'
-    wb.save(response)
-    return response
+    filename_header = f'attachment; filename="{filename_ascii}"'
+    if q:
+        # البحث الحر مش بيتخزن (كل نص = ملف جديد في الكاش)
+        return build_file_response(build, filename_header)
+    path = get_or_build("export", {"q": "", "supervisor_id": supervisor_id or "", "sf": sf}, build)
+    return cached_file_response(path, filename_header)
 
 
 @login_required
@@ -705,56 +739,8 @@ def export_department_excel(request):
 
     dept = get_object_or_404(Department, id=int(dept_id))
 
-    excluded_for_active = [
-        Research.Status.DISCUSSED,
-        Research.Status.DISMISSED,
-        Research.Status.CANCELLED,
-    ]
-    if sf == "discussed":
-        status_filter = Q(status=Research.Status.DISCUSSED)
-    elif sf == "dismissed":
-        status_filter = Q(status=Research.Status.DISMISSED)
-    elif sf == "all":
-        status_filter = Q()
-    elif sf == "active_discussed":
-        status_filter = ~Q(status__in=[Research.Status.DISMISSED, Research.Status.CANCELLED])
-    else:
-        status_filter = ~Q(status__in=excluded_for_active)
-
-    dept_supervisors = Supervisor.objects.filter(department=dept, is_active=True)
-    researches = (
-        Research.objects.filter(researchsupervision__supervisor__in=dept_supervisors)
-        .filter(status_filter)
-        .distinct()
-        .prefetch_related("researchsupervision_set__supervisor")
-    )
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = f"{dept.name}"
-
-    headers = ["#", "اسم الباحث", "النوع", "الدرجة", "عنوان الرسالة", "المشرفون", "الحالة"]
-    ws.append(headers)
-
-    for idx, research in enumerate(researches, start=1):
-        supervisors = ", ".join([link.supervisor.name for link in research.researchsupervision_set.all()])
-        researcher_type = "معيد" if research.researcher_type == Research.ResearcherType.ASSISTANT else "باحث"
-        degree = "دكتوراه" if research.degree == Research.Degree.PHD else "ماجستير"
-        ws.append([idx, research.researcher_name, researcher_type, degree, research.title or "", supervisors, research.get_status_display()])
-
-    for cell in ws[1]:
-        cell.font = openpyxl.styles.Font(color="FFFFFF", bold=True)
-        cell.fill = openpyxl.styles.PatternFill(start_color="1a4f9c", end_color="1a4f9c", fill_type="solid")
-
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                max_length = max(max_length, len(str(cell.value)))
-            except Exception:
-                pass
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
+    sf = bucket_for(sf)
+    path = get_or_build("department", {"dept_id": dept.id, "sf": sf}, lambda: build_department_workbook(dept, sf=sf))
 
     filter_name = {
         "active": "الحاليين",
@@ -765,9 +751,77 @@ def export_department_excel(request):
     }.get(sf, sf)
     filename = f"{dept.name}_{filter_name}_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
 
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    return cached_file_response(path, f'attachment; filename="{filename}"')
+
+
+STREAM_FORMATS = {
+    "csv": (stream_csv, CSV_CONTENT_TYPE),
+    "ndjson": (stream_ndjson, NDJSON_CONTENT_TYPE),
+}
+
+
+def _stream_response(researches, fmt: str, filename: str) -> StreamingHttpResponse:
+    stream, content_type = STREAM_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(researches), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+@login_required
+def export_stream(request, fmt: str):
+    """صفوف خام (csv/ndjson) بنفس فلاتر export.xlsx - للأنظمة التانية."""
+    if not can_edit(request.user):
+        messages.error(request, "غير مصرح لك بالتصدير (الأدمن فقط).")
+        return redirect("home")
+
+    q = (request.GET.get("q") or "").strip()
+    supervisor_id = request.GET.get("supervisor_id")
+    sf = (request.GET.get("sf") or "active").strip().lower()
+
+    researches, sf = export_researches_qs(q=q, supervisor_id=supervisor_id, sf=sf)
+    return _stream_response(researches, fmt, f"researches__{sf}__{datetime.now().strftime('%Y-%m-%d')}")
+
+
+@login_required
+def export_department_stream(request, fmt: str):
+    """صفوف خام (csv/ndjson) بنفس فلاتر export-department.xlsx."""
+    if not can_edit(request.user):
+        messages.error(request, "غير مصرح لك بالتصدير (الأدمن فقط).")
+        return redirect("home")
+
+    dept_id = request.GET.get("dept_id")
+    sf = (request.GET.get("sf") or "active").strip().lower()
+
+    if not dept_id:
+        return HttpResponse("يجب اختيار قسم", status=400)
+
+    dept = get_object_or_404(Department, id=int(dept_id))
+
+    researches, sf = department_researches_qs(dept, sf=sf)
+    return _stream_response(researches, fmt, f"{dept.name}_{sf}_{datetime.now().strftime('%Y-%m-%d')}")
+
+
+@login_required
+def export_pack(request):
+    """
+    zip فيه workbook لكل قسم + لكل مشرف.
+    الحزمة بتتبني برا الـ request (thread في الخلفية أو python manage.py export_pack)
+    والصفحة بتستنى لحد ما الملف الجاهز يبقى في الكاش.
+    """
+    if not can_edit(request.user):
+        messages.error(request, "غير مصرح لك بالتصدير (الأدمن فقط).")
+        return redirect("home")
+
+    sf = bucket_for(request.GET.get("sf"))
+
+    path, _ = cached_pack(sf)
+    if path is None:
+        start_pack_build(sf)
+        return render(request, "frontend/export_pack_wait.html", {"sf": sf})
+
+    filename = f"export_pack__{sf}__{datetime.now().strftime('%Y-%m-%d')}.zip"
+    response = FileResponse(open(path, "rb"), content_type="application/zip")
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
     return response
 
 
@@ -1015,7 +1069,7 @@ def delete_fees_year(request, research_id, year):
 
 
 # ============================================================
-# Upload Researchers (admin only) - موجودة علشان urls مايتكسرش
+# Upload Researchers (admin only) - استيراد في الخلفية
 # ============================================================
 
 @login_required
@@ -1023,7 +1077,49 @@ def upload_researchers(request):
     if not can_edit(request.user):
         messages.error(request, "غير مصرح لك بالرفع (الأدمن فقط).")
         return redirect("home")
-    return render(request, "frontend/upload_researchers.html")
+
+    if request.method == "POST":
+        f = request.FILES.get("file")
+        if not f:
+            messages.error(request, "اختر ملف Excel أولاً.")
+            return redirect("upload_researchers")
+        if not f.name.lower().endswith(".xlsx"):
+            messages.error(request, "الملف يجب أن يكون بصيغة .xlsx")
+            return redirect("upload_researchers")
+
+        # ✅ استيراد واحد في نفس الوقت (الـ worker كمان بياخد import_lock قبل ما يبدأ)
+        running = active_import_job()
+        if running:
+            messages.error(request, "فيه استيراد شغال دلوقتي - استنى لحد ما يخلص.")
+            return redirect(f"{reverse('upload_researchers')}?job={running.id}")
+        if import_lock_holder():
+            messages.error(request, "فيه استيراد شغال دلوقتي (من السيرفر) - استنى لحد ما يخلص.")
+            return redirect("upload_researchers")
+
+        job = ImportJob.objects.create(
+            file=f,
+            original_name=f.name,
+            sheet=(request.POST.get("sheet") or "").strip(),
+            full=bool(request.POST.get("full")),
+            created_by=request.user,
+        )
+        start_import_job(job)
+        return redirect(f"{reverse('upload_researchers')}?job={job.id}")
+
+    job = None
+    job_id = request.GET.get("job")
+    if job_id and str(job_id).isdigit():
+        job = ImportJob.objects.filter(id=int(job_id)).first()
+
+    return render(request, "frontend/upload_researchers.html", {"job": job})
+
+
+@login_required
+def import_job_status(request, job_id):
+    if not can_edit(request.user):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    job = get_object_or_404(ImportJob, id=job_id)
+    return JsonResponse(job_progress(job))
 
 
 # ============================================================